@@ -7,7 +7,7 @@ from .detection_engine import PIIDetectionEngine, PIIEntity, DetectionResult
 from .file_processor import FileProcessor, FileInfo, ProcessingResult
 from .document_modifier import DocumentModifier, ModificationResult
 from .report_generator import ReportGenerator
-from .performance_optimizer import PerformanceOptimizer, PerformanceCaps, PerformanceMetrics, LaptopOptimizedProcessor
+from .performance_optimizer import PerformanceOptimizer, PerformanceCaps, PerformanceMetrics, PerformanceSnapshot, LaptopOptimizedProcessor
 from .cli import CloakAndStyleCLI
 
 __all__ = [
@@ -32,6 +32,7 @@ __all__ = [
     'PerformanceOptimizer',
     'PerformanceCaps',
     'PerformanceMetrics',
+    'PerformanceSnapshot',
     'LaptopOptimizedProcessor',
     
     # CLI
@@ -7,9 +7,10 @@ Implements Epic E requirements for batch processing and command-line interface
 import argparse
 import sys
 import os
-import glob
+import fnmatch
+import re
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Pattern
 import logging
 
 try:
@@ -75,29 +76,20 @@ class CloakAndStyleCLI:
         """Collect files to process based on input path and patterns"""
         files = []
         input_path = Path(input_path)
+        include_re = self._compile_patterns(include_patterns)
+        exclude_re = self._compile_patterns(exclude_patterns)
         
         if input_path.is_file():
             # Single file
-            if self._should_process_file(input_path, include_patterns, exclude_patterns):
+            if self._should_process_file(input_path, include_re, exclude_re):
                 files.append(str(input_path))
         elif input_path.is_dir():
-            # Directory
-            if recursive:
-                # Recursive search
-                for pattern in include_patterns or ["*"]:
-                    pattern_path = input_path / "**" / pattern
-                    files.extend([
-                        str(f) for f in input_path.rglob(pattern)
-                        if f.is_file() and self._should_process_file(f, include_patterns, exclude_patterns)
-                    ])
-            else:
-                # Non-recursive search
-                for pattern in include_patterns or ["*"]:
-                    pattern_path = input_path / pattern
-                    files.extend([
-                        str(f) for f in input_path.glob(pattern)
-                        if f.is_file() and self._should_process_file(f, include_patterns, exclude_patterns)
-                    ])
+            # Directory: walk it once and match every name against the combined patterns
+            candidates = input_path.rglob("*") if recursive else input_path.iterdir()
+            files.extend(
+                str(f) for f in candidates
+                if f.is_file() and self._should_process_file(f, include_re, exclude_re)
+            )
         else:
             raise FileNotFoundError(f"Input path not found: {input_path}")
         
@@ -106,26 +98,28 @@ class CloakAndStyleCLI:
         logger.info(f"Collected {len(files)} files to process")
         return files
     
-    def _should_process_file(self, file_path: Path, include_patterns: Optional[List[str]] = None,
-                           exclude_patterns: Optional[List[str]] = None) -> bool:
-        """Check if file should be processed based on patterns"""
-        filename = file_path.name.lower()
+    def _should_process_file(self, file_path: Path, include_re: Optional[Pattern] = None,
+                           exclude_re: Optional[Pattern] = None) -> bool:
+        """Check if file should be processed based on compiled patterns"""
+        filename = os.path.normcase(file_path.name.lower())
         
         # Check include patterns
-        if include_patterns:
-            if not any(self._matches_pattern(filename, pattern) for pattern in include_patterns):
-                return False
+        if include_re and not include_re.match(filename):
+            return False
         
         # Check exclude patterns
-        if exclude_patterns:
-            if any(self._matches_pattern(filename, pattern) for pattern in exclude_patterns):
-                return False
+        if exclude_re and exclude_re.match(filename):
+            return False
         
         return True
     
-    def _matches_pattern(self, filename: str, pattern: str) -> bool:
-        """Check if filename matches glob pattern"""
-        return glob.fnmatch.fnmatch(filename, pattern.lower())
+    def _compile_patterns(self, patterns: Optional[List[str]]) -> Optional[Pattern]:
+        """Combine glob patterns into one case-insensitive regex"""
+        if not patterns:
+            return None
+        return re.compile('|'.join(
+            fnmatch.translate(os.path.normcase(pattern.lower())) for pattern in patterns
+        ))
     
     def process_single_file(self, file_path: str, output_dir: str, dry_run: bool = False) -> Dict[str, Any]:
         """Process a single file"""
@@ -216,27 +210,11 @@ class CloakAndStyleCLI:
     def generate_reports(self, results: List[Dict[str, Any]], output_dir: str, 
                         report_formats: List[str], config: Dict[str, Any]) -> Dict[str, str]:
         """Generate reports in specified formats"""
-        report_files = {}
-        
         # Convert CLI results to ProcessingResult format for report generator
         processing_results = self._convert_to_processing_results(results)
         
-        if 'html' in report_formats:
-            html_path = os.path.join(output_dir, "cloak_and_style_report.html")
-            self.report_generator.generate_html_report(processing_results, config, html_path)
-            report_files['html'] = html_path
-        
-        if 'json' in report_formats:
-            json_path = os.path.join(output_dir, "cloak_and_style_report.json")
-            self.report_generator.generate_json_report(processing_results, config, json_path)
-            report_files['json'] = json_path
-        
-        if 'csv' in report_formats:
-            csv_path = os.path.join(output_dir, "cloak_and_style_findings.csv")
-            self.report_generator.generate_csv_findings(processing_results, csv_path)
-            report_files['csv'] = csv_path
-        
-        return report_files
+        # One stats pass shared by all formats, rendered concurrently
+        return self.report_generator.generate_all(processing_results, config, output_dir, report_formats)
     
     def _convert_to_processing_results(self, results: List[Dict[str, Any]]) -> List[Any]:
         """Convert CLI results to ProcessingResult format for report generator"""
@@ -7,13 +7,51 @@ Combines rule-based detection with ML-based detection using PII Masker
 import re
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 from pathlib import Path
 
+# google-re2 is optional; it lets one set scan pre-screen all rule patterns
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# Other modules named re2 (pyre2, a stray re2/ directory) import but lack the Set API
+if re2 is not None and not hasattr(re2, 'Set'):
+    re2 = None
+
 # Add the pii-mask directory to the path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'pii-mask', 'pii-masker'))
 
+# Rule-based patterns, matched case-insensitively
+RULE_PATTERNS = {
+    'EMAIL': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    'PHONE': r'\b\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b(?!\d)',
+    'SSN': r'\b\d{3}-\d{2}-\d{4}\b',
+    'CREDIT_CARD': r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b',
+    'IP_ADDRESS': r'\b(?:\d{1,3}\.){3}\d{1,3}\b',
+    'URL': r'https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:[\w.])*)?)?',
+    'DATE': r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b',
+    'ZIP_CODE': r'\b\d{5}(?:-\d{4})?\b'
+}
+
+@lru_cache(maxsize=None)
+def _compile_pattern(pattern: str) -> re.Pattern:
+    """Compiled form of a rule pattern, shared by every engine and call"""
+    return re.compile(pattern, re.IGNORECASE)
+
+# Compile the defaults at import rather than on the first detection
+for _pattern in RULE_PATTERNS.values():
+    _compile_pattern(_pattern)
+
+# Luhn lookup tables: ASCII digit -> its value, and -> its doubled digit sum
+_NON_DIGIT_RE = re.compile(r'\D')
+_DIGIT_VALUES = bytes.maketrans(b'0123456789', bytes(range(10)))
+_LUHN_DOUBLED = bytes.maketrans(b'0123456789', bytes((0, 2, 4, 6, 8, 1, 3, 5, 7, 9)))
+
 @dataclass
 class PIIEntity:
     """Represents a detected PII entity"""
@@ -98,16 +136,10 @@ class PIIDetectionEngine:
                         print("🔄 Falling back to rule-based detection only")
         
         # Rule-based patterns
-        self.patterns = {
-            'EMAIL': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            'PHONE': r'\b\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b(?!\d)',
-            'SSN': r'\b\d{3}-\d{2}-\d{4}\b',
-            'CREDIT_CARD': r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b',
-            'IP_ADDRESS': r'\b(?:\d{1,3}\.){3}\d{1,3}\b',
-            'URL': r'https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:[\w.])*)?)?',
-            'DATE': r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b',
-            'ZIP_CODE': r'\b\d{5}(?:-\d{4})?\b'
-        }
+        self.patterns = dict(RULE_PATTERNS)
+        
+        # Multi-pattern pre-screen over all rule patterns (None without RE2)
+        self._pattern_set, self._unscreened_types = self._build_pattern_set()
         
         # Validation functions
         self.validators = {
@@ -161,30 +193,119 @@ class PIIDetectionEngine:
             residual_entities=residual_entities
         )
     
+    def detect_pii_batch(self, texts: List[str], max_workers: int = 1) -> List[DetectionResult]:
+        """Detect PII in a batch of text fragments, returning one result per fragment"""
+        # Rule-based regex matching holds the GIL, so threads only pay off
+        # when an ML model (which releases it during inference) is loaded
+        if max_workers > 1 and len(texts) > 1 and self._has_ml_detector():
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(texts))) as executor:
+                return list(executor.map(self._detect_if_needed, texts))
+        
+        return [self._detect_if_needed(text) for text in texts]
+    
+    def _detect_if_needed(self, text: str) -> DetectionResult:
+        """Run detection unless the pre-filter rules the text out"""
+        if self.may_contain_pii(text):
+            return self.detect_pii(text)
+        return self._passthrough_result(text)
+    
+    def _has_ml_detector(self) -> bool:
+        """Check whether any ML detector is loaded"""
+        return bool(self.longtransformer_detector or self.ml_detector or
+                    self.fallback_ner_model or self.base_deberta)
+    
+    def may_contain_pii(self, text: str) -> bool:
+        """Cheap pre-filter: False only when no rule or ML detection could fire on the text"""
+        stripped = text.strip()
+        
+        # ML detections shorter than 2 characters are filtered out anyway
+        if len(stripped) < 2:
+            return False
+        
+        # Without letters only the numeric patterns (SSN, phone, IP, date, ZIP, card)
+        # can match, and all of them need at least 4 digits
+        if not any(char.isalpha() for char in stripped):
+            return sum(char.isdigit() for char in stripped) >= 4
+        
+        # ML models can pick up names in plain words
+        if self._has_ml_detector():
+            return True
+        
+        # Every rule-based pattern needs a digit, an '@' or a URL scheme
+        return '@' in stripped or '://' in stripped or any(char.isdigit() for char in stripped)
+    
+    def _passthrough_result(self, text: str) -> DetectionResult:
+        """Result for text that was skipped by the pre-filter"""
+        return DetectionResult(
+            entities_found=[],
+            masked_content=text,
+            original_text=text,
+            processing_time=0.0,
+            questionable_entities=[],
+            residual_entities=[]
+        )
+    
+    def _build_pattern_set(self):
+        """Compile the rule patterns into one RE2 set, when google-re2 is installed
+        
+        Returns the set and the entity types whose pattern RE2 cannot compile
+        (e.g. lookaheads); those are always scanned.
+        """
+        if re2 is None:
+            return None, []
+        
+        options = re2.Options()
+        options.case_sensitive = False
+        options.log_errors = False
+        pattern_set = re2.Set.SearchSet(options)
+        
+        ids = {}
+        unscreened = []
+        for entity_type, pattern in self.patterns.items():
+            try:
+                ids[pattern_set.Add(pattern)] = entity_type
+            except re2.error:
+                unscreened.append(entity_type)
+        
+        pattern_set.Compile()
+        return (pattern_set, ids), unscreened
+    
+    def _candidate_patterns(self, text: str):
+        """Rule patterns that can match the text, in pattern order"""
+        # RE2's \d, \w and \b are ASCII-only, so only trust the screen on ASCII text
+        if self._pattern_set is None or not text.isascii():
+            return self.patterns.items()
+        
+        pattern_set, ids = self._pattern_set
+        matched = {ids[i] for i in pattern_set.Match(text) or ()}
+        matched.update(self._unscreened_types)
+        return [(entity_type, pattern) for entity_type, pattern in self.patterns.items()
+                if entity_type in matched]
+    
+    def _scan_patterns(self, text: str):
+        """Yield (entity_type, match) for every validated rule-pattern match"""
+        for entity_type, pattern in self._candidate_patterns(text):
+            validator = self.validators.get(entity_type)
+            for match in _compile_pattern(pattern).finditer(text):
+                # Apply validation if available
+                if validator is None or validator(match.group()):
+                    yield entity_type, match
+    
     def _detect_rule_based(self, text: str) -> List[PIIEntity]:
         """Detect PII using regex patterns and validation"""
         entities = []
         
-        for entity_type, pattern in self.patterns.items():
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            
-            for match in matches:
-                value = match.group()
-                
-                # Apply validation if available
-                if entity_type in self.validators:
-                    if not self.validators[entity_type](value):
-                        continue
-                
-                entities.append(PIIEntity(
-                    entity_type=entity_type,
-                    value=value,
-                    start_pos=match.start(),
-                    end_pos=match.end(),
-                    confidence=1.0,  # High confidence for rule-based detection
-                    detection_method="rule_based",
-                    status="auto_masked"
-                ))
+        for entity_type, match in self._scan_patterns(text):
+            value = match.group()
+            entities.append(PIIEntity(
+                entity_type=entity_type,
+                value=value,
+                start_pos=match.start(),
+                end_pos=match.end(),
+                confidence=1.0,  # High confidence for rule-based detection
+                detection_method="rule_based",
+                status="auto_masked"
+            ))
         
         return entities
     
@@ -389,24 +510,18 @@ class PIIDetectionEngine:
         residual_entities = []
         
         # Check for any remaining PII patterns
-        for entity_type, pattern in self.patterns.items():
-            matches = re.finditer(pattern, masked_text, re.IGNORECASE)
-            for match in matches:
-                value = match.group()
-                # Apply validation if available
-                if entity_type in self.validators:
-                    if not self.validators[entity_type](value):
-                        continue
-                
-                residual_entities.append(PIIEntity(
-                    entity_type=entity_type,
-                    value=value,
-                    start_pos=match.start(),
-                    end_pos=match.end(),
-                    confidence=1.0,
-                    detection_method="residual_validation",
-                    status="residual"
-                ))
+        for entity_type, match in self._scan_patterns(masked_text):
+            value = match.group()
+            
+            residual_entities.append(PIIEntity(
+                entity_type=entity_type,
+                value=value,
+                start_pos=match.start(),
+                end_pos=match.end(),
+                confidence=1.0,
+                detection_method="residual_validation",
+                status="residual"
+            ))
         
         return residual_entities
     
@@ -552,19 +667,19 @@ class PIIDetectionEngine:
     def _luhn_check(self, number: str) -> bool:
         """Validate credit card number using Luhn algorithm"""
         # Remove non-digits
-        digits = [int(d) for d in str(number) if d.isdigit()]
+        digits = _NON_DIGIT_RE.sub('', str(number))
         
         if len(digits) < 13 or len(digits) > 19:
             return False
         
-        # Luhn algorithm
-        checksum = 0
-        for i, digit in enumerate(reversed(digits)):
-            if i % 2 == 1:
-                doubled = digit * 2
-                checksum += doubled if doubled < 10 else doubled - 9
-            else:
-                checksum += digit
+        # Normalize non-ASCII decimal digits (e.g. Arabic-Indic) to ASCII
+        if not digits.isascii():
+            digits = ''.join(str(int(d)) for d in digits)
+        
+        # Luhn algorithm: translate every other digit from the right through
+        # a lookup table and sum the resulting bytes, all without a Python loop
+        data = digits.encode('ascii')
+        checksum = sum(data[-1::-2].translate(_DIGIT_VALUES)) + sum(data[-2::-2].translate(_LUHN_DOUBLED))
         
         return checksum % 10 == 0
     
@@ -5,9 +5,14 @@ Handles creating new files with masked content for all supported file types
 """
 
 import os
+import re
 import csv
+import html
 import json
-from typing import List, Dict, Tuple, Optional, Any
+import time
+from string import Template
+from functools import partial
+from typing import List, Dict, Tuple, Optional, Any, Callable
 from pathlib import Path
 from dataclasses import dataclass
 
@@ -18,7 +23,32 @@ except ImportError:
     from detection_engine import PIIDetectionEngine, PIIEntity, DetectionResult
     from file_processor import FileProcessor, FileInfo, ProcessingResult
 
-@dataclass
+# Document libraries are optional; a missing one only disables its file type
+try:
+    from docx import Document
+except ImportError:
+    Document = None
+
+try:
+    from pptx import Presentation
+    from pptx.enum.shapes import MSO_SHAPE_TYPE
+except ImportError:
+    Presentation = None
+    MSO_SHAPE_TYPE = None
+
+try:
+    import openpyxl
+    from openpyxl.comments import Comment
+except ImportError:
+    openpyxl = None
+    Comment = None
+
+try:
+    import fitz
+except ImportError:
+    fitz = None
+
+@dataclass(slots=True)
 class ModificationResult:
     """Result of document modification"""
     original_file: str
@@ -58,8 +88,15 @@ class DocumentModifier:
             'generate_txt_output': True,
             'mask_formulas': True,
             'preserve_formatting': True,
-            'include_page_breaks': True
+            'include_page_breaks': True,
+            'write_chunk_size': 1 << 20  # 1M characters per encoded write
         }
+        
+        # Escapes masked text for HTML output and turns newlines into breaks in one pass
+        self._html_escape_table = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '\n': '<br>'})
+        
+        # Static HTML shell for PDF HTML output, built once per modifier
+        self._html_shell_pre, self._html_shell_post, self._html_header_template = self._get_html_shell()
     
     def modify_file(self, input_file: str, output_dir: str = None, 
                    mask_format: str = "token") -> ModificationResult:
@@ -74,7 +111,6 @@ class DocumentModifier:
         Returns:
             ModificationResult with modification details
         """
-        import time
         start_time = time.time()
         
         input_path = Path(input_file)
@@ -97,13 +133,13 @@ class DocumentModifier:
         
         # Process the file first
         try:
-            processing_result = self.file_processor.process_file(str(input_path))
-            
-            # Get the modification method
+            # Resolve the modification method before doing any detection work
             modifier = self.modification_methods.get(suffix)
             if not modifier:
                 raise ValueError(f"Unsupported file type for modification: {suffix}")
             
+            processing_result = self.file_processor.process_file(str(input_path))
+            
             # Apply modification
             modification_result = modifier(str(input_path), str(output_path), processing_result, mask_format)
             
@@ -138,8 +174,7 @@ class DocumentModifier:
                          processing_result: ProcessingResult, mask_format: str) -> Dict[str, Any]:
         """Modify text file with masked content"""
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(processing_result.masked_content)
+            self._write_masked_content(output_file, processing_result.masked_content)
             
             return {}
         except Exception as e:
@@ -150,190 +185,210 @@ class DocumentModifier:
         """Modify CSV file with masked content"""
         try:
             # The masked content is already in CSV format from the processor
-            with open(output_file, 'w', encoding='utf-8', newline='') as f:
-                f.write(processing_result.masked_content)
+            self._write_masked_content(output_file, processing_result.masked_content, newline='')
             
             return {}
         except Exception as e:
             raise Exception(f"Error modifying CSV file: {e}")
     
+    def _write_masked_content(self, output_file: str, content: str, newline: Optional[str] = None):
+        """Write masked text in slices so only one slice is encoded to bytes at a time"""
+        chunk_size = self.config['write_chunk_size']
+        with open(output_file, 'w', encoding='utf-8', newline=newline, buffering=chunk_size) as f:
+            for start in range(0, len(content), chunk_size):
+                f.write(content[start:start + chunk_size])
+    
     def _modify_docx_file(self, input_file: str, output_file: str, 
                          processing_result: ProcessingResult, mask_format: str) -> Dict[str, Any]:
         """Modify DOCX file with masked content and advanced features"""
         try:
-            from docx import Document
-            from docx.shared import Inches
+            if Document is None:
+                raise ImportError("python-docx is not installed")
             
-            # Load the original document
+            # Load the original document and mask it in place, so styles,
+            # sections, images and headers/footers survive untouched
             doc = Document(input_file)
+            fragments, writers = [], []
             
-            # Create a new document for the masked version
-            masked_doc = Document()
+            # Collect body paragraphs and tables
+            self._collect_docx_fragments(doc, fragments, writers)
             
-            # Copy document properties
-            masked_doc.core_properties.title = doc.core_properties.title
-            masked_doc.core_properties.author = doc.core_properties.author
-            masked_doc.core_properties.subject = doc.core_properties.subject
+            # Collect headers and footers that carry their own content
+            for section in doc.sections:
+                for part in (section.header, section.footer):
+                    if not part.is_linked_to_previous:
+                        self._collect_docx_fragments(part, fragments, writers)
             
-            # Process paragraphs with masking
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    # Get masked text for this paragraph
-                    result = self.detection_engine.detect_pii(paragraph.text)
-                    masked_text = result.masked_content
-                    
-                    # Add masked paragraph to new document
-                    new_para = masked_doc.add_paragraph(masked_text)
-                    
-                    # Copy paragraph formatting
-                    new_para.style = paragraph.style
-                    new_para.alignment = paragraph.alignment
-            
-            # Process tables
-            for table in doc.tables:
-                # Create new table with same dimensions
-                new_table = masked_doc.add_table(rows=len(table.rows), cols=len(table.columns))
-                new_table.style = table.style
-                
-                for i, row in enumerate(table.rows):
-                    for j, cell in enumerate(row.cells):
-                        if cell.text.strip():
-                            # Get masked text for this cell
-                            result = self.detection_engine.detect_pii(cell.text)
-                            new_table.cell(i, j).text = result.masked_content
-            
-            # Process comments if enabled
+            # Collect comments if enabled
             if processing_result.comments_masked > 0:
                 for comment in doc.comments:
-                    # Add comment to new document
-                    result = self.detection_engine.detect_pii(comment.text)
-                    masked_doc.add_comment(result.masked_content)
+                    self._collect_docx_fragments(comment, fragments, writers)
+            
+            # Detect in one pass and write masked text back
+            self._apply_masking(fragments, writers)
             
             # Save the masked document
-            masked_doc.save(output_file)
+            doc.save(output_file)
             
             return {}
         except Exception as e:
             raise Exception(f"Error modifying DOCX file: {e}")
     
+    def _collect_docx_fragments(self, container, fragments: List[str], writers: List[Callable[[str], None]]):
+        """Collect paragraphs of a python-docx block container, descending into tables"""
+        for paragraph in container.paragraphs:
+            self._collect_paragraph(paragraph, fragments, writers)
+        
+        for table in container.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    self._collect_docx_fragments(cell, fragments, writers)
+    
     def _modify_pptx_file(self, input_file: str, output_file: str, 
                          processing_result: ProcessingResult, mask_format: str) -> Dict[str, Any]:
         """Modify PPTX file with masked content and advanced features"""
         try:
-            from pptx import Presentation
-            from copy import deepcopy
+            if Presentation is None:
+                raise ImportError("python-pptx is not installed")
             
-            # Load the original presentation
+            # Load the original presentation and mask it in place, so slide
+            # masters, layouts and shape geometry are kept without copying
             prs = Presentation(input_file)
+            fragments, writers = [], []
             
-            # Create a new presentation
-            masked_prs = Presentation()
-            
-            # Copy slide masters
-            for slide_master in prs.slide_masters:
-                masked_prs.slide_masters.append(deepcopy(slide_master._element))
-            
-            # Process slides
+            # Collect slides
             for slide in prs.slides:
-                # Create new slide
-                new_slide = masked_prs.slides.add_slide(masked_prs.slide_layouts[0])
-                
-                # Process shapes
-                for shape in slide.shapes:
-                    if hasattr(shape, 'text_frame'):
-                        # Get masked text
-                        result = self.detection_engine.detect_pii(shape.text)
-                        
-                        # Add text box with masked content
-                        textbox = new_slide.shapes.add_textbox(
-                            shape.left, shape.top, shape.width, shape.height
-                        )
-                        textbox.text = result.masked_content
+                # Collect shapes
+                self._collect_pptx_fragments(slide.shapes, fragments, writers)
                 
-                # Process speaker notes if enabled
-                if processing_result.comments_masked > 0 and slide.notes_slide:
-                    notes_text = slide.notes_slide.notes_text_frame.text
-                    if notes_text.strip():
-                        result = self.detection_engine.detect_pii(notes_text)
-                        new_slide.notes_slide.notes_text_frame.text = result.masked_content
+                # Collect speaker notes if enabled
+                if processing_result.comments_masked > 0 and slide.has_notes_slide:
+                    for paragraph in slide.notes_slide.notes_text_frame.paragraphs:
+                        self._collect_paragraph(paragraph, fragments, writers)
+            
+            # Detect in one pass and write masked text back
+            self._apply_masking(fragments, writers)
             
             # Save the masked presentation
-            masked_prs.save(output_file)
+            prs.save(output_file)
             
             return {}
         except Exception as e:
             raise Exception(f"Error modifying PPTX file: {e}")
     
+    def _collect_pptx_fragments(self, shapes, fragments: List[str], writers: List[Callable[[str], None]]):
+        """Collect paragraphs of pptx shapes, descending into groups and tables"""
+        for shape in shapes:
+            if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+                self._collect_pptx_fragments(shape.shapes, fragments, writers)
+            elif getattr(shape, 'has_table', False):
+                for row in shape.table.rows:
+                    for cell in row.cells:
+                        for paragraph in cell.text_frame.paragraphs:
+                            self._collect_paragraph(paragraph, fragments, writers)
+            elif hasattr(shape, 'text_frame'):
+                for paragraph in shape.text_frame.paragraphs:
+                    self._collect_paragraph(paragraph, fragments, writers)
+    
+    def _collect_paragraph(self, paragraph, fragments: List[str], writers: List[Callable[[str], None]]):
+        """Queue a docx/pptx paragraph for masking"""
+        # Detect on the whole paragraph so PII split across runs is still caught
+        text = paragraph.text
+        if text.strip():
+            fragments.append(text)
+            writers.append(partial(self._replace_paragraph_text, paragraph, text))
+    
+    def _replace_paragraph_text(self, paragraph, text: str, masked_text: str):
+        """Write masked text into a docx/pptx paragraph, keeping run formatting where possible"""
+        runs = paragraph.runs
+        if runs and "".join(run.text for run in runs) == text:
+            # Keep the first run's formatting and collapse the rest into it
+            runs[0].text = masked_text
+            for run in runs[1:]:
+                run.text = ""
+        else:
+            # Hyperlinks, line breaks or fields outside plain runs
+            paragraph.text = masked_text
+    
+    def _apply_masking(self, fragments: List[str], writers: List[Callable[[str], None]]):
+        """Run detection over all collected fragments at once and write back changed ones"""
+        # Repeated strings (headers, categorical cells) are detected only once per
+        # document; masking is per fragment, so the masked text is identical
+        unique_fragments = list(dict.fromkeys(fragments))
+        results = self.detection_engine.detect_pii_batch(unique_fragments)
+        masked_by_fragment = {
+            fragment: result.masked_content
+            for fragment, result in zip(unique_fragments, results)
+        }
+        
+        for fragment, write in zip(fragments, writers):
+            masked_text = masked_by_fragment[fragment]
+            if masked_text != fragment:
+                write(masked_text)
+    
     def _modify_xlsx_file(self, input_file: str, output_file: str, 
                          processing_result: ProcessingResult, mask_format: str) -> Dict[str, Any]:
         """Modify XLSX file with masked content and advanced features"""
         try:
-            import openpyxl
-            from openpyxl.utils import get_column_letter
+            if openpyxl is None:
+                raise ImportError("openpyxl is not installed")
             
-            # Load the original workbook
+            # Load the original workbook and mask it in place, so formatting,
+            # column widths and merged cells are kept without copying
             wb = openpyxl.load_workbook(input_file)
+            fragments, writers = [], []
+            
+            # Hoisted out of the per-cell loop
+            mask_formulas = self.config['mask_formulas']
+            add_fragment = fragments.append
+            add_writer = writers.append
+            collect_comments = processing_result.comments_masked > 0
+            
+            # Collect each sheet
+            for sheet in wb.worksheets:
+                # Walk only the cells the sheet stores; iter_rows and sheet.values
+                # would create a Cell for every gap in the used range
+                for cell in sheet._cells.values():
+                    # Collect comments if enabled
+                    if collect_comments and cell.comment:
+                        add_fragment(cell.comment.text)
+                        add_writer(partial(self._replace_cell_comment, cell))
+                    
+                    value = cell.value
+                    if value is None:
+                        continue
+                    
+                    # Only string values can hold a formula
+                    if type(value) is str:
+                        if mask_formulas and value.startswith('='):
+                            # Mask literals in formulas
+                            masked_formula = self._mask_formula_literals(value)
+                            if masked_formula != value:
+                                cell.value = masked_formula
+                            continue
+                        cell_text = value
+                    else:
+                        cell_text = str(value)
+                    
+                    # Regular text masking; only changed cells are rewritten,
+                    # so numbers and dates keep their type
+                    add_fragment(cell_text)
+                    add_writer(partial(setattr, cell, 'value'))
             
-            # Create a new workbook
-            masked_wb = openpyxl.Workbook()
-            
-            # Process each sheet
-            for sheet_name in wb.sheetnames:
-                sheet = wb[sheet_name]
-                
-                # Create new sheet
-                if sheet_name == masked_wb.active.title:
-                    masked_sheet = masked_wb.active
-                    masked_sheet.title = sheet_name
-                else:
-                    masked_sheet = masked_wb.create_sheet(sheet_name)
-                
-                # Process cells
-                for row in sheet.iter_rows():
-                    for cell in row:
-                        if cell.value is not None:
-                            cell_text = str(cell.value)
-                            
-                            # Check if cell contains formula
-                            if cell_text.startswith('=') and self.config['mask_formulas']:
-                                # Mask literals in formulas
-                                masked_formula = self._mask_formula_literals(cell_text)
-                                masked_sheet[cell.coordinate] = masked_formula
-                            else:
-                                # Regular text masking
-                                result = self.detection_engine.detect_pii(cell_text)
-                                masked_sheet[cell.coordinate] = result.masked_content
-                
-                # Copy formatting
-                for row in sheet.iter_rows():
-                    for cell in row:
-                        if cell.has_style:
-                            masked_cell = masked_sheet[cell.coordinate]
-                            masked_cell.font = cell.font
-                            masked_cell.border = cell.border
-                            masked_cell.fill = cell.fill
-                            masked_cell.number_format = cell.number_format
-                            masked_cell.protection = cell.protection
-                            masked_cell.alignment = cell.alignment
-                
-                # Process comments if enabled
-                if processing_result.comments_masked > 0:
-                    # Process comments in cells
-                    for row in sheet.iter_rows():
-                        for cell in row:
-                            if cell.comment:
-                                result = self.detection_engine.detect_pii(cell.comment.text)
-                                masked_sheet[cell.coordinate].comment = openpyxl.comments.Comment(
-                                    result.masked_content, cell.comment.author
-                                )
+            # Detect in one pass and write masked text back
+            self._apply_masking(fragments, writers)
             
             # Save the masked workbook
-            masked_wb.save(output_file)
+            wb.save(output_file)
             
             return {}
         except Exception as e:
             raise Exception(f"Error modifying XLSX file: {e}")
     
+    def _replace_cell_comment(self, cell, masked_text: str):
+        """Replace an openpyxl cell comment with its masked text"""
+        cell.comment = Comment(masked_text, cell.comment.author)
+    
     def _mask_formula_literals(self, formula: str) -> str:
         """Mask literals embedded in Excel formulas while preserving function structure"""
         try:
@@ -341,8 +396,6 @@ class DocumentModifier:
             # In a full implementation, you would parse the formula and mask only literals
             
             # For now, we'll mask common patterns that might contain PII
-            import re
-            
             # Mask email addresses in formulas
             formula = re.sub(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', '[EMAIL_XXX]', formula)
             
@@ -360,18 +413,16 @@ class DocumentModifier:
                         processing_result: ProcessingResult, mask_format: str) -> Dict[str, Any]:
         """Modify PDF file with masked content and generate HTML/TXT output"""
         try:
-            import fitz
+            if fitz is None:
+                raise ImportError("PyMuPDF is not installed")
             
             # Check if it's an image-only PDF
             if processing_result.file_info.is_image_only_pdf:
                 raise Exception("Cannot modify image-only PDF - no text content to mask")
             
-            # Load the original PDF
+            # Load the original PDF; pages are redacted in place so layout is kept
             doc = fitz.open(input_file)
             
-            # Create a new PDF
-            masked_doc = fitz.open()
-            
             html_output = ""
             txt_output = ""
             
@@ -384,20 +435,17 @@ class DocumentModifier:
                 if page_text.strip():
                     result = self.detection_engine.detect_pii(page_text)
                     masked_text = result.masked_content
+                    
+                    # Redact detected entities on the page itself
+                    self._redact_pdf_page(page, result.entities_found)
                 else:
                     masked_text = "[No text content]"
                 
-                # Create new page
-                new_page = masked_doc.new_page(width=page.rect.width, height=page.rect.height)
-                
-                # Add masked text to new page
-                new_page.insert_text((50, 50), masked_text, fontsize=12)
-                
                 # Add to HTML output
                 if self.config['generate_html_output']:
                     html_output += f"<div class='page' id='page-{page_num + 1}'>\n"
                     html_output += f"<h2>Page {page_num + 1}</h2>\n"
-                    html_output += f"<div class='content'>{masked_text.replace(chr(10), '<br>')}</div>\n"
+                    html_output += f"<div class='content'>{masked_text.translate(self._html_escape_table)}</div>\n"
                     if self.config['include_page_breaks']:
                         html_output += "<div class='page-break'></div>\n"
                     html_output += "</div>\n"
@@ -411,8 +459,7 @@ class DocumentModifier:
                         txt_output += "\f"  # Form feed for page break
             
             # Save the masked PDF
-            masked_doc.save(output_file)
-            masked_doc.close()
+            doc.save(output_file, garbage=4, deflate=True)
             doc.close()
             
             # Generate HTML output file
@@ -435,9 +482,36 @@ class DocumentModifier:
         except Exception as e:
             raise Exception(f"Error modifying PDF file: {e}")
     
+    def _redact_pdf_page(self, page, entities: List[PIIEntity]):
+        """Replace detected entities on a PDF page with redaction boxes"""
+        for entity in entities:
+            # search_for matches within a line, so look up multi-line values piecewise
+            for fragment in entity.value.splitlines():
+                if not fragment.strip():
+                    continue
+                for rect in page.search_for(fragment):
+                    page.add_redact_annot(rect, text=f"[{entity.entity_type.upper()}]", fill=(1, 1, 1))
+        
+        if entities:
+            page.apply_redactions()
+    
     def _generate_html_output(self, html_file: str, content: str, processing_result: ProcessingResult):
         """Generate HTML output with proper formatting"""
-        html_template = f"""
+        header = self._html_header_template.substitute(
+            path=html.escape(processing_result.file_info.path),
+            count=len(processing_result.entities_found),
+            time=f"{processing_result.processing_time:.2f}"
+        )
+        
+        with open(html_file, 'w', encoding='utf-8') as f:
+            f.write(self._html_shell_pre)
+            f.write(header)
+            f.write(content)
+            f.write(self._html_shell_post)
+    
+    def _get_html_shell(self) -> Tuple[str, str, Template]:
+        """Get the static HTML shell (before/after content) and the header template"""
+        html_shell_pre = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -445,69 +519,73 @@ class DocumentModifier:
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Masked PDF Content</title>
     <style>
-        body {{
+        body {
             font-family: Arial, sans-serif;
             line-height: 1.6;
             margin: 20px;
             background-color: #f5f5f5;
-        }}
-        .container {{
+        }
+        .container {
             max-width: 800px;
             margin: 0 auto;
             background-color: white;
             padding: 20px;
             box-shadow: 0 0 10px rgba(0,0,0,0.1);
-        }}
-        .page {{
+        }
+        .page {
             margin-bottom: 30px;
             padding: 20px;
             border: 1px solid #ddd;
             border-radius: 5px;
-        }}
-        .page h2 {{
+        }
+        .page h2 {
             color: #333;
             border-bottom: 2px solid #007acc;
             padding-bottom: 10px;
-        }}
-        .content {{
+        }
+        .content {
             margin-top: 15px;
             white-space: pre-wrap;
-        }}
-        .page-break {{
+        }
+        .page-break {
             page-break-after: always;
-        }}
-        .header {{
+        }
+        .header {
             background-color: #007acc;
             color: white;
             padding: 15px;
             margin-bottom: 20px;
             border-radius: 5px;
-        }}
-        .footer {{
+        }
+        .footer {
             margin-top: 30px;
             padding: 15px;
             background-color: #f8f9fa;
             border-radius: 5px;
             font-size: 0.9em;
             color: #666;
-        }}
-        @media print {{
-            .page-break {{
+        }
+        @media print {
+            .page-break {
                 page-break-after: always;
-            }}
-        }}
+            }
+        }
     </style>
 </head>
 <body>
     <div class="container">
-        <div class="header">
+"""
+        
+        html_header_template = Template("""        <div class="header">
             <h1>Masked PDF Content</h1>
-            <p>Original file: {processing_result.file_info.path}</p>
-            <p>Entities masked: {len(processing_result.entities_found)}</p>
-            <p>Processing time: {processing_result.processing_time:.2f} seconds</p>
+            <p>Original file: $path</p>
+            <p>Entities masked: $count</p>
+            <p>Processing time: $time seconds</p>
         </div>
         
-        {content}
+        """)
+        
+        html_shell_post = """
         
         <div class="footer">
             <p>Generated by Cloak & Style - PII Data Scrubber</p>
@@ -518,8 +596,7 @@ class DocumentModifier:
 </html>
 """
         
-        with open(html_file, 'w', encoding='utf-8') as f:
-            f.write(html_template)
+        return html_shell_pre, html_shell_post, html_header_template
     
     def get_supported_modification_types(self) -> List[str]:
         """Get list of file types that support full modification"""
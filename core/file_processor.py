@@ -6,17 +6,116 @@ Handles different file types and integrates with the detection engine
 
 import os
 import csv
-import json
-import chardet
+import re
+import mmap
+import posixpath
+import codecs
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import List, Dict, Tuple, Optional, Any, Generator
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
+from datetime import date, datetime
+from types import SimpleNamespace
 
 try:
     from .detection_engine import PIIDetectionEngine, PIIEntity, DetectionResult
 except ImportError:
     from detection_engine import PIIDetectionEngine, PIIEntity, DetectionResult
 
+# Prefer the C implementation of chardet when it is installed (faust-cchardet)
+try:
+    import cchardet as chardet
+except ImportError:
+    import chardet
+
+# calamine (Rust) parses XLSX cell values far faster than openpyxl when installed
+try:
+    from python_calamine import CalamineWorkbook, SheetTypeEnum
+except ImportError:
+    CalamineWorkbook = None
+
+# pyarrow's multi-threaded CSV tokenizer is used for large files when installed
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pa_compute
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+# Byte order marks, longest first so UTF-32 is not mistaken for UTF-16
+_BOM_ENCODINGS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# posix_fadvise lets bulk runs queue reads ahead without extra threads (Linux/most Unix)
+_HAS_FADVISE = hasattr(os, 'posix_fadvise')
+
+# File types read as text; the rest are ZIP/PDF containers with no text encoding
+_TEXT_FILE_TYPES = frozenset({'.txt', '.csv', '.md', '.log'})
+
+# WordprocessingML markers for tracked insertions/deletions and hyperlinks
+_DOCX_INS_PATTERN = re.compile(rb'<w:ins[\s>]')
+_DOCX_DEL_PATTERN = re.compile(rb'<w:del[\s>]')
+_DOCX_HYPERLINK_PATTERN = re.compile(rb'<w:hyperlink[\s>]')
+
+# OOXML namespaces for reading DOCX/PPTX parts directly
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+_R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PACKAGE_RELS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# A SpreadsheetML formula element (<f>, <f t="shared" .../>), with or without a prefix
+_XLSX_FORMULA_RE = re.compile(rb'<(?:\w+:)?f[\s/>]')
+
+# Text equivalents of WordprocessingML run content, as python-docx reports them
+_DOCX_RUN_TEXT = {_W + 'tab': '\t', _W + 'ptab': '\t', _W + 'cr': '\n', _W + 'noBreakHyphen': '-'}
+
+
+def _normalize_calamine_value(value: Any) -> Any:
+    """Match openpyxl cell values: empty cells are None, whole numbers ints, dates datetimes"""
+    if value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    # calamine gives date-only cells as dates; openpyxl reads them as midnight datetimes
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+# Optional document libraries are imported on first use and memoized, so a
+# missing package only fails the file types that need it
+@lru_cache(maxsize=1)
+def _get_openpyxl():
+    import openpyxl
+    return openpyxl
+
+
+@lru_cache(maxsize=1)
+def _get_etree():
+    from lxml import etree
+    return etree
+
+
+@lru_cache(maxsize=1)
+def _get_pptx_presentation():
+    from pptx import Presentation
+    return Presentation
+
+
+@lru_cache(maxsize=1)
+def _get_fitz():
+    import fitz
+    return fitz
+
 @dataclass
 class FileInfo:
     """Information about a file being processed"""
@@ -73,8 +172,20 @@ class FileProcessor:
             'extract_tracked_changes': True,
             'extract_hyperlinks': True,
             'extract_chart_labels': True,
-            'detect_image_only_pdfs': True
+            'detect_image_only_pdfs': True,
+            'detection_workers': min(8, os.cpu_count() or 1),  # Threads per document for ML detection
+            'arrow_csv_min_size': 1 << 20,  # Use pyarrow for streamed CSVs from 1MB, if installed
+            'skip_trivial_cells': True  # Copy CSV cells the detector's pre-filter rules out verbatim
         }
+        
+        # Files are usually processed twice (findings, then modification);
+        # keyed on (path, mtime, size) so edits invalidate the entry
+        self._detect_encoding_cached = lru_cache(maxsize=256)(self._sniff_encoding)
+        
+        # Documents parsed during analysis (XLSX sheets, open PDFs), consumed by
+        # the matching processor so each file is only loaded once per process_file call;
+        # process_file discards whatever its processor did not take
+        self._preloaded: Dict[Tuple[str, int, int], Any] = {}
     
     def process_file(self, file_path: str) -> ProcessingResult:
         """
@@ -86,26 +197,29 @@ class FileProcessor:
         Returns:
             ProcessingResult with detection and masking results
         """
-        import time
         start_time = time.time()
         
         file_path = Path(file_path)
         
-        if not file_path.exists():
+        # One stat serves the existence check, size cap, and file info
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        # Get file information
-        file_info = self._get_file_info(file_path)
+        # Check file size limits before analysis loads the document
+        if stat.st_size > self.detection_engine.config['caps'].get('file_size_mb', 50) * 1024 * 1024:
+            raise ValueError(f"File too large: {stat.st_size} bytes")
         
-        # Check file size limits
-        if file_info.size > self.detection_engine.config['caps'].get('file_size_mb', 50) * 1024 * 1024:
-            raise ValueError(f"File too large: {file_info.size} bytes")
-        
-        # Process based on file type
-        processor = self.supported_types.get(file_path.suffix.lower())
+        # Resolve the processor before analysis so unsupported files are never opened
+        file_type = file_path.suffix.lower()
+        processor = self.supported_types.get(file_type)
         if not processor:
             raise ValueError(f"Unsupported file type: {file_path.suffix}")
         
+        # Get file information, preloading the document for the processor
+        file_info = self._get_file_info(file_path, stat, file_type, preload=True)
+        
         try:
             masked_content, entities, advanced_stats = processor(file_path, file_info)
             
@@ -154,15 +268,92 @@ class FileProcessor:
                 questionable_entities=[],
                 residual_entities=[]
             )
+        finally:
+            self._discard_preloaded(self._file_version_key(file_path, stat))
+    
+    def _discard_preloaded(self, key: Tuple[str, int, int]) -> None:
+        """Drop a preloaded document the processor did not consume, closing an open PDF"""
+        preloaded = self._preloaded.pop(key, None)
+        if isinstance(preloaded, tuple):
+            doc, _ = preloaded
+            doc.close()
     
-    def _get_file_info(self, file_path: Path) -> FileInfo:
-        """Get comprehensive file information"""
+    def process_files(self, file_paths: List[str], readahead: int = 64) -> List[ProcessingResult]:
+        """
+        Process many files in order, queueing reads for upcoming files ahead of time
+        
+        Args:
+            file_paths: Paths of the files to process
+            readahead: Number of upcoming files to hint to the kernel for read-ahead
+            
+        Returns:
+            One ProcessingResult per path, in input order
+        """
+        results = []
+        prefetched = 0
+        for index, file_path in enumerate(file_paths):
+            # Keep a window of pending reads so small files don't each pay full I/O latency
+            window_end = min(len(file_paths), index + readahead)
+            while prefetched < window_end:
+                self._prefetch_file(file_paths[prefetched])
+                prefetched += 1
+            
+            results.append(self.process_file(file_path))
+        
+        return results
+    
+    def process_files_parallel(self, file_paths: List[str], workers: Optional[int] = None) -> List[ProcessingResult]:
+        """
+        Process many files across worker processes, each with its own detection engine
+        
+        Args:
+            file_paths: Paths of the files to process
+            workers: Number of worker processes (defaults to the CPU count)
+            
+        Returns:
+            One ProcessingResult per path, in input order
+        """
+        workers = min(workers or os.cpu_count() or 1, len(file_paths))
+        if workers <= 1:
+            return self.process_files(file_paths)
+        
+        # Engines (and any ML models) are built once per worker, not per file;
+        # several files per task keeps pickling overhead low
+        chunksize = max(1, len(file_paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.detection_engine.config, self.config)) as executor:
+            return list(executor.map(_process_in_worker, file_paths, chunksize=chunksize))
+    
+    def _prefetch_file(self, file_path: str) -> None:
+        """Ask the kernel to start reading a file in the background"""
+        if not _HAS_FADVISE:
+            return
+        
+        # Never hint past the size cap; larger files are rejected before being read
+        max_bytes = self.detection_engine.config['caps'].get('file_size_mb', 50) * 1024 * 1024
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+        except OSError:
+            return  # process_file reports missing or unreadable files
+        try:
+            os.posix_fadvise(fd, 0, max_bytes, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+    
+    def _get_file_info(self, file_path: Path, stat: Optional[os.stat_result] = None,
+                       file_type: Optional[str] = None, preload: bool = False) -> FileInfo:
+        """Get comprehensive file information, keeping parsed documents for processing if preload"""
         # Basic file info
-        stat = file_path.stat()
-        file_type = file_path.suffix.lower()
+        stat = stat or file_path.stat()
+        file_type = file_type or file_path.suffix.lower()
         
-        # Detect encoding
-        encoding = self._detect_encoding(file_path)
+        # Detect encoding (text files only)
+        if file_type in _TEXT_FILE_TYPES:
+            encoding = self._detect_encoding(file_path, stat)
+        else:
+            encoding = 'binary'
         
         # Get additional info based on file type
         row_count = None
@@ -174,15 +365,15 @@ class FileProcessor:
         is_image_only_pdf = False
         
         if file_type == '.csv':
-            row_count, column_count = self._count_csv_rows_columns(file_path)
+            row_count, column_count = self._count_csv_rows_columns(file_path, encoding)
         elif file_type == '.xlsx':
-            row_count, column_count, has_comments = self._analyze_xlsx_file(file_path)
+            row_count, column_count, has_comments = self._analyze_xlsx_file(file_path, stat, preload)
         elif file_type == '.docx':
             has_comments, has_tracked_changes, has_hyperlinks = self._analyze_docx_file(file_path)
         elif file_type == '.pptx':
             has_comments, has_hyperlinks = self._analyze_pptx_file(file_path)
         elif file_type == '.pdf':
-            page_count, is_image_only_pdf = self._analyze_pdf_file(file_path)
+            page_count, is_image_only_pdf = self._analyze_pdf_file(file_path, stat, preload)
         
         return FileInfo(
             path=str(file_path),
@@ -199,72 +390,136 @@ class FileProcessor:
             is_image_only_pdf=is_image_only_pdf
         )
     
-    def _detect_encoding(self, file_path: Path) -> str:
-        """Detect file encoding using chardet"""
+    def _detect_encoding(self, file_path: Path, stat: Optional[os.stat_result] = None) -> str:
+        """Detect file encoding, reusing the cached answer while the file is unchanged"""
+        try:
+            stat = stat or file_path.stat()
+        except OSError:
+            return 'utf-8'
+        return self._detect_encoding_cached(str(file_path), stat.st_mtime_ns, stat.st_size)
+    
+    def _sniff_encoding(self, file_path: str, mtime_ns: int, size: int) -> str:
+        """Sniff file encoding, trying BOM and UTF-8 checks before chardet"""
+        # mtime_ns and size are only part of the cache key
         try:
-            with open(file_path, 'rb') as f:
-                raw_data = f.read(10000)  # Read first 10KB for encoding detection
-                result = chardet.detect(raw_data)
-                return result['encoding'] or 'utf-8'
+            # A raw descriptor skips the buffered file object for a single read
+            fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+            try:
+                raw_data = os.read(fd, 10000)  # Read first 10KB for encoding detection
+            finally:
+                os.close(fd)
+            
+            for bom, encoding in _BOM_ENCODINGS:
+                if raw_data.startswith(bom):
+                    return encoding
+            
+            # Most inputs are UTF-8; the incremental decoder tolerates a
+            # multi-byte character cut off at the end of the sample
+            try:
+                codecs.getincrementaldecoder('utf-8')().decode(raw_data, final=False)
+                return 'utf-8'
+            except UnicodeDecodeError:
+                pass
+            
+            result = chardet.detect(raw_data)
+            return result['encoding'] or 'utf-8'
         except Exception:
             return 'utf-8'
     
-    def _count_csv_rows_columns(self, file_path: Path) -> Tuple[int, int]:
+    def _count_csv_rows_columns(self, file_path: Path, encoding: str) -> Tuple[int, int]:
         """Count rows and columns in CSV file"""
         try:
-            with open(file_path, 'r', encoding=self._detect_encoding(file_path)) as f:
-                reader = csv.reader(f)
-                rows = list(reader)
-                return len(rows), max(len(row) for row in rows) if rows else 0
+            with open(file_path, 'r', encoding=encoding) as f:
+                # Single streaming pass; only one row is held in memory at a time
+                row_count = 0
+                max_columns = 0
+                for row in csv.reader(f):
+                    row_count += 1
+                    if len(row) > max_columns:
+                        max_columns = len(row)
+                return row_count, max_columns
         except Exception:
             return 0, 0
     
-    def _analyze_xlsx_file(self, file_path: Path) -> Tuple[int, int, bool]:
+    def _analyze_xlsx_file(self, file_path: Path, stat: Optional[os.stat_result] = None,
+                           preload: bool = False) -> Tuple[int, int, bool]:
         """Analyze XLSX file for rows, columns, and comments"""
         try:
-            import openpyxl
-            wb = openpyxl.load_workbook(file_path, read_only=False)  # Don't use read_only for comment detection
-            total_rows = 0
-            total_columns = 0
-            has_comments = False
-            
+            sheets = self._read_xlsx_sheets(file_path)
+        except Exception:
+            return 0, 0, False
+        
+        if preload:
+            self._preloaded[self._file_version_key(file_path, stat)] = sheets
+        
+        total_rows = sum(len(rows) for _, rows, _ in sheets)
+        total_columns = max((len(rows[0]) for _, rows, _ in sheets if rows), default=0)
+        has_comments = any(comments for _, _, comments in sheets)
+        return total_rows, total_columns, has_comments
+    
+    def _read_xlsx_sheets(self, file_path: Path) -> List[Tuple[str, List[tuple], List[str]]]:
+        """Load an XLSX workbook once, returning (name, cell values, comment texts) per sheet"""
+        # calamine exposes neither cell comments nor formula text (only the cached
+        # result, empty until Excel recalculates), so those workbooks stay on openpyxl
+        if CalamineWorkbook is not None and not self._xlsx_needs_openpyxl(file_path):
+            return self._read_xlsx_sheets_calamine(file_path)
+        
+        openpyxl = _get_openpyxl()
+        wb = openpyxl.load_workbook(file_path, read_only=False)  # Read-only cells carry no comments
+        try:
+            sheets = []
             for sheet in wb.worksheets:
-                total_rows += sheet.max_row
-                total_columns = max(total_columns, sheet.max_column)
-                # Check for comments
-                if hasattr(sheet, '_comments') and sheet._comments:
-                    has_comments = True
-                # Also check for comments in cells
+                rows = []
+                comments = []
                 for row in sheet.iter_rows():
-                    for cell in row:
-                        if cell.comment:
-                            has_comments = True
-                            break
-                    if has_comments:
-                        break
-            
+                    rows.append(tuple(cell.value for cell in row))
+                    comments.extend(cell.comment.text for cell in row if cell.comment)
+                sheets.append((sheet.title, rows, comments))
+            return sheets
+        finally:
             wb.close()
-            return total_rows, total_columns, has_comments
-        except Exception:
-            return 0, 0, False
+    
+    def _read_xlsx_sheets_calamine(self, file_path: Path) -> List[Tuple[str, List[tuple], List[str]]]:
+        """Read XLSX cell values with calamine"""
+        wb = CalamineWorkbook.from_path(str(file_path))
+        try:
+            sheets = []
+            for metadata in wb.sheets_metadata:
+                if metadata.typ != SheetTypeEnum.WorkSheet:
+                    continue
+                values = wb.get_sheet_by_name(metadata.name).to_python(skip_empty_area=False)
+                rows = [tuple(map(_normalize_calamine_value, row)) for row in values]
+                sheets.append((metadata.name, rows, []))
+            return sheets
+        finally:
+            wb.close()
+    
+    def _xlsx_needs_openpyxl(self, file_path: Path) -> bool:
+        """Check the package for comment parts or formula cells without parsing any XML"""
+        with zipfile.ZipFile(file_path) as package:
+            names = package.namelist()
+            if any(name.startswith('xl/comments') for name in names):
+                return True
+            return any(
+                _XLSX_FORMULA_RE.search(package.read(name))
+                for name in names if name.startswith('xl/worksheets/') and name.endswith('.xml')
+            )
+    
+    def _file_version_key(self, file_path: Path, stat: Optional[os.stat_result] = None) -> Tuple[str, int, int]:
+        """Key preloaded documents on (path, mtime, size) so an edited file is reloaded"""
+        stat = stat or file_path.stat()
+        return str(file_path), stat.st_mtime_ns, stat.st_size
     
     def _analyze_docx_file(self, file_path: Path) -> Tuple[bool, bool, bool]:
         """Analyze DOCX file for comments, tracked changes, and hyperlinks"""
         try:
-            from docx import Document
-            doc = Document(file_path)
+            # Scan the package XML once instead of re-serializing every run
+            with zipfile.ZipFile(file_path) as package:
+                body = package.read('word/document.xml')
+                has_comments = 'word/comments.xml' in package.namelist()
             
-            has_comments = len(doc.comments) > 0
-            has_tracked_changes = False
-            has_hyperlinks = False
-            
-            # Check for tracked changes and hyperlinks in paragraphs
-            for paragraph in doc.paragraphs:
-                for run in paragraph.runs:
-                    if run._element.xml.find('w:ins') != -1 or run._element.xml.find('w:del') != -1:
-                        has_tracked_changes = True
-                    if run._element.xml.find('w:hyperlink') != -1:
-                        has_hyperlinks = True
+            has_tracked_changes = bool(_DOCX_INS_PATTERN.search(body) or _DOCX_DEL_PATTERN.search(body))
+            has_hyperlinks = bool(_DOCX_HYPERLINK_PATTERN.search(body))
             
             return has_comments, has_tracked_changes, has_hyperlinks
         except Exception:
@@ -273,7 +528,7 @@ class FileProcessor:
     def _analyze_pptx_file(self, file_path: Path) -> Tuple[bool, bool]:
         """Analyze PPTX file for speaker notes and hyperlinks"""
         try:
-            from pptx import Presentation
+            Presentation = _get_pptx_presentation()
             prs = Presentation(file_path)
             
             has_comments = False
@@ -296,26 +551,36 @@ class FileProcessor:
         except Exception:
             return False, False
     
-    def _analyze_pdf_file(self, file_path: Path) -> Tuple[int, bool]:
+    def _analyze_pdf_file(self, file_path: Path, stat: Optional[os.stat_result] = None,
+                          preload: bool = False) -> Tuple[int, bool]:
         """Analyze PDF file for page count and image-only detection"""
         try:
-            import fitz
+            fitz = _get_fitz()
             doc = fitz.open(str(file_path))
+        except Exception:
+            return 0, False
+        
+        try:
             page_count = len(doc)
             
-            # Check if PDF is image-only
+            # Check if PDF is image-only; probed page text is kept for processing
             is_image_only = True
+            page_texts = {}
             for page_num in range(min(3, page_count)):  # Check first 3 pages
-                page = doc.load_page(page_num)
-                text = page.get_text()
-                if text.strip():
+                page_texts[page_num] = doc.load_page(page_num).get_text()
+                if page_texts[page_num].strip():
                     is_image_only = False
                     break
-            
-            doc.close()
-            return page_count, is_image_only
         except Exception:
+            doc.close()
             return 0, False
+        
+        if preload:
+            # Keep the document open for _process_pdf_file instead of reparsing it
+            self._preloaded[self._file_version_key(file_path, stat)] = (doc, page_texts)
+        else:
+            doc.close()
+        return page_count, is_image_only
     
     def _process_text_file(self, file_path: Path, file_info: FileInfo) -> Tuple[str, List[PIIEntity], Dict[str, int]]:
         """Process text file with streaming support"""
@@ -327,7 +592,7 @@ class FileProcessor:
     def _process_text_file_streaming(self, file_path: Path, file_info: FileInfo) -> Tuple[str, List[PIIEntity], Dict[str, int]]:
         """Process large text file using streaming"""
         all_entities = []
-        masked_content = ""
+        masked_parts = []
         
         try:
             with open(file_path, 'r', encoding=file_info.encoding) as f:
@@ -335,23 +600,37 @@ class FileProcessor:
                     # Process chunk
                     result = self.detection_engine.detect_pii(chunk)
                     all_entities.extend(result.entities_found)
-                    masked_content += result.masked_content
+                    masked_parts.append(result.masked_content)
         except Exception as e:
             raise Exception(f"Error processing text file: {e}")
         
-        return masked_content, all_entities, {}
+        return "".join(masked_parts), all_entities, {}
     
     def _process_text_file_standard(self, file_path: Path, file_info: FileInfo) -> Tuple[str, List[PIIEntity], Dict[str, int]]:
         """Process text file using standard method"""
         try:
-            with open(file_path, 'r', encoding=file_info.encoding) as f:
-                content = f.read()
+            content = self._read_text_mapped(file_path, file_info)
             
             result = self.detection_engine.detect_pii(content)
             return result.masked_content, result.entities_found, {}
         except Exception as e:
             raise Exception(f"Error processing text file: {e}")
     
+    def _read_text_mapped(self, file_path: Path, file_info: FileInfo) -> str:
+        """Read a whole text file by decoding straight from a memory map"""
+        if file_info.size == 0:
+            return ""
+        
+        with open(file_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Decoding the mapped pages skips the intermediate bytes copy of f.read()
+                content = str(memoryview(mm), file_info.encoding)
+        
+        # Match text-mode universal newline handling
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content
+    
     def _read_file_chunks(self, file_obj, chunk_size: int = None) -> Generator[str, None, None]:
         """Read file in chunks"""
         if chunk_size is None:
@@ -372,100 +651,143 @@ class FileProcessor:
     
     def _process_csv_file_streaming(self, file_path: Path, file_info: FileInfo) -> Tuple[str, List[PIIEntity], Dict[str, int]]:
         """Process large CSV file using streaming"""
-        all_entities = []
-        masked_rows = []
-        
         try:
-            with open(file_path, 'r', encoding=file_info.encoding) as f:
-                reader = csv.reader(f)
-                for row_num, row in enumerate(reader):
-                    masked_row = []
-                    for col_num, cell in enumerate(row):
-                        # Process cell
-                        result = self.detection_engine.detect_pii(cell)
-                        masked_row.append(result.masked_content)
-                        
-                        # Add location info to entities
-                        for entity in result.entities_found:
-                            entity.start_pos = col_num
-                            entity.end_pos = col_num + 1
-                            entity.location = f"Row {row_num + 1}, Column {col_num + 1}"
-                        all_entities.extend(result.entities_found)
-                    
-                    masked_rows.append(masked_row)
+            rows = None
+            if pa is not None and file_info.size >= self.config['arrow_csv_min_size']:
+                rows = self._read_csv_rows_arrow(file_path, file_info)
+            
+            if rows is not None:
+                masked_rows, all_entities = self._process_csv_rows(rows)
+            else:
+                with open(file_path, 'r', encoding=file_info.encoding) as f:
+                    masked_rows, all_entities = self._process_csv_rows(csv.reader(f))
         except Exception as e:
             raise Exception(f"Error processing CSV file: {e}")
         
-        # Convert back to CSV format
-        import io
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerows(masked_rows)
-        masked_content = output.getvalue()
-        
-        return masked_content, all_entities, {}
+        return self._format_csv_rows(masked_rows), all_entities, {}
     
     def _process_csv_file_standard(self, file_path: Path, file_info: FileInfo) -> Tuple[str, List[PIIEntity], Dict[str, int]]:
         """Process CSV file using standard method"""
-        all_entities = []
-        masked_rows = []
-        
         try:
             with open(file_path, 'r', encoding=file_info.encoding) as f:
-                reader = csv.reader(f)
-                for row_num, row in enumerate(reader):
-                    masked_row = []
-                    for col_num, cell in enumerate(row):
-                        # Process cell
-                        result = self.detection_engine.detect_pii(cell)
-                        masked_row.append(result.masked_content)
-                        
-                        # Add location info to entities
-                        for entity in result.entities_found:
-                            entity.start_pos = col_num
-                            entity.end_pos = col_num + 1
-                            entity.location = f"Row {row_num + 1}, Column {col_num + 1}"
-                        all_entities.extend(result.entities_found)
-                    
-                    masked_rows.append(masked_row)
+                masked_rows, all_entities = self._process_csv_rows(csv.reader(f))
         except Exception as e:
             raise Exception(f"Error processing CSV file: {e}")
         
-        # Convert back to CSV format
-        import io
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerows(masked_rows)
-        masked_content = output.getvalue()
+        return self._format_csv_rows(masked_rows), all_entities, {}
+    
+    def _read_csv_rows_arrow(self, file_path: Path, file_info: FileInfo) -> Optional[List[tuple]]:
+        """Tokenize a CSV with pyarrow, or return None where only csv.reader matches the old output"""
+        with open(file_path, 'r', encoding=file_info.encoding, newline='') as f:
+            header = next(csv.reader(f), None)
+        
+        # Single-column files can't tell a blank line from an empty cell
+        if not header or len(header) < 2:
+            return None
+        
+        # Explicit names keep the header as a data row; every column stays a plain string
+        column_names = [f"f{i}" for i in range(len(header))]
+        try:
+            table = pa_csv.read_csv(
+                str(file_path),
+                read_options=pa_csv.ReadOptions(
+                    column_names=column_names, encoding=file_info.encoding, block_size=8 << 20
+                ),
+                parse_options=pa_csv.ParseOptions(newlines_in_values=True, ignore_empty_lines=False),
+                convert_options=pa_csv.ConvertOptions(
+                    column_types={name: pa.string() for name in column_names},
+                    strings_can_be_null=False,
+                    quoted_strings_can_be_null=False
+                )
+            )
+        except pa.ArrowInvalid:
+            # Ragged rows, which csv.reader passes through as-is
+            return None
+        
+        # Match csv.reader in text mode, which reads \r\n and \r inside quoted cells as \n
+        columns = [pa_compute.replace_substring_regex(column, r'\r\n?', '\n') for column in table.columns]
+        rows = list(zip(*(column.to_pylist() for column in columns)))
+        
+        # pyarrow reads a blank line as a row of empty cells, where csv.reader gives an
+        # empty row; a row of empty cells can also be ",,", so only csv.reader can tell
+        if any(not any(row) for row in rows):
+            return None
+        return rows
+    
+    def _process_csv_rows(self, reader) -> Tuple[List[List[str]], List[PIIEntity]]:
+        """Mask CSV rows, passing each row's cells to the detector as one batch"""
+        all_entities = []
+        masked_rows = []
+        skip_trivial_cells = self.config['skip_trivial_cells']
         
-        return masked_content, all_entities, {}
+        for row_num, row in enumerate(reader):
+            # Empty, whitespace and short numeric cells (under 4 digits, too short
+            # for any numeric pattern) are copied through without a detector call
+            if skip_trivial_cells:
+                columns = [
+                    col_num for col_num, cell in enumerate(row)
+                    if cell and not cell.isspace() and not (len(cell) < 4 and cell.isdigit())
+                ]
+            else:
+                columns = range(len(row))
+            
+            # Cells are detected separately, so PII can never straddle a cell boundary
+            results = self.detection_engine.detect_pii_batch([row[col_num] for col_num in columns])
+            masked_row = list(row)
+            
+            # Add location info to entities
+            for col_num, result in zip(columns, results):
+                masked_row[col_num] = result.masked_content
+                for entity in result.entities_found:
+                    entity.start_pos = col_num
+                    entity.end_pos = col_num + 1
+                    entity.location = f"Row {row_num + 1}, Column {col_num + 1}"
+                all_entities.extend(result.entities_found)
+            
+            masked_rows.append(masked_row)
+        
+        return masked_rows, all_entities
+    
+    def _format_csv_rows(self, masked_rows: List[List[str]]) -> str:
+        """Convert masked rows back to CSV format"""
+        parts = []
+        append = parts.append
+        # Rows that need quoting go through csv.writer, appending to the same list
+        writer = csv.writer(SimpleNamespace(write=append))
+        
+        for row in masked_rows:
+            line = ",".join(row)
+            # No delimiter, quote or line break inside any cell: csv.writer would emit
+            # the plain join (a lone empty cell is the exception, written as "")
+            if (line.count(',') == len(row) - 1 and '"' not in line and '\n' not in line
+                    and '\r' not in line and (line or len(row) != 1)):
+                append(line + "\r\n")
+            else:
+                writer.writerow(row)
+        
+        return "".join(parts)
     
     def _process_docx_file(self, file_path: Path, file_info: FileInfo) -> Tuple[str, List[PIIEntity], Dict[str, int]]:
         """Process DOCX file with advanced features"""
         try:
-            from docx import Document
-            doc = Document(file_path)
+            include_comments = self.config['extract_comments'] and file_info.has_comments
+            paragraphs, comments = self._read_docx_text(file_path, include_comments)
             
             all_entities = []
-            masked_content = ""
+            masked_parts = []
             comments_masked = 0
             hyperlinks_processed = 0
             tracked_changes_processed = 0
             
             # Process paragraphs
-            for paragraph in doc.paragraphs:
-                paragraph_text = paragraph.text
-                result = self.detection_engine.detect_pii(paragraph_text)
+            for result in self.detection_engine.detect_pii_batch(paragraphs, self.config['detection_workers']):
                 all_entities.extend(result.entities_found)
-                masked_content += result.masked_content + "\n"
+                masked_parts.append(result.masked_content + "\n")
             
             # Process comments if enabled
-            if self.config['extract_comments'] and file_info.has_comments:
-                for comment in doc.comments:
-                    comment_text = comment.text
-                    result = self.detection_engine.detect_pii(comment_text)
-                    all_entities.extend(result.entities_found)
-                    comments_masked += 1
+            for result in self.detection_engine.detect_pii_batch(comments, self.config['detection_workers']):
+                all_entities.extend(result.entities_found)
+                comments_masked += 1
             
             # Process tracked changes if enabled
             if self.config['extract_tracked_changes'] and file_info.has_tracked_changes:
@@ -479,7 +801,7 @@ class FileProcessor:
                 # For now, we'll mark that we detected hyperlinks
                 hyperlinks_processed = 1
             
-            return masked_content, all_entities, {
+            return "".join(masked_parts), all_entities, {
                 'comments_masked': comments_masked,
                 'hyperlinks_processed': hyperlinks_processed,
                 'tracked_changes_processed': tracked_changes_processed
@@ -490,82 +812,214 @@ class FileProcessor:
     def _process_pptx_file(self, file_path: Path, file_info: FileInfo) -> Tuple[str, List[PIIEntity], Dict[str, int]]:
         """Process PPTX file with advanced features"""
         try:
-            from pptx import Presentation
-            prs = Presentation(file_path)
+            slides = self._read_pptx_text(file_path, self.config['extract_comments'])
             
             all_entities = []
-            masked_content = ""
+            masked_parts = []
             comments_masked = 0
             hyperlinks_processed = 0
             
+            # Collect text units for every slide first, then detect them in one batch
+            texts = []
+            slide_layout = []  # (paragraph count, has speaker notes) per slide
+            for paragraphs, notes_text in slides:
+                texts.extend(paragraphs)
+                has_notes = bool(notes_text and notes_text.strip())
+                if has_notes:
+                    texts.append(notes_text)
+                slide_layout.append((len(paragraphs), has_notes))
+            
+            results = self.detection_engine.detect_pii_batch(texts, self.config['detection_workers'])
+            
             # Process slides
-            for slide_num, slide in enumerate(prs.slides):
-                masked_content += f"Slide {slide_num + 1}:\n"
+            position = 0
+            for slide_num, (paragraph_count, has_notes) in enumerate(slide_layout):
+                masked_parts.append(f"Slide {slide_num + 1}:\n")
                 
-                for shape in slide.shapes:
-                    if hasattr(shape, 'text_frame'):
-                        for paragraph in shape.text_frame.paragraphs:
-                            paragraph_text = paragraph.text
-                            result = self.detection_engine.detect_pii(paragraph_text)
-                            all_entities.extend(result.entities_found)
-                            masked_content += result.masked_content + "\n"
+                for result in results[position:position + paragraph_count]:
+                    all_entities.extend(result.entities_found)
+                    masked_parts.append(result.masked_content + "\n")
+                position += paragraph_count
                 
-                # Process speaker notes if enabled
-                if self.config['extract_comments'] and slide.notes_slide:
-                    notes_text = slide.notes_slide.notes_text_frame.text
-                    if notes_text.strip():
-                        result = self.detection_engine.detect_pii(notes_text)
-                        all_entities.extend(result.entities_found)
-                        comments_masked += 1
-                        masked_content += f"Speaker Notes: {result.masked_content}\n"
+                if has_notes:
+                    result = results[position]
+                    position += 1
+                    all_entities.extend(result.entities_found)
+                    comments_masked += 1
+                    masked_parts.append(f"Speaker Notes: {result.masked_content}\n")
             
-            return masked_content, all_entities, {
+            return "".join(masked_parts), all_entities, {
                 'comments_masked': comments_masked,
                 'hyperlinks_processed': hyperlinks_processed
             }
         except Exception as e:
             raise Exception(f"Error processing PPTX file: {e}")
     
+    def _read_package_xml(self, package: zipfile.ZipFile, part_name: str):
+        """Parse one XML part of an OOXML package, without entity expansion"""
+        etree = _get_etree()
+        return etree.fromstring(package.read(part_name), etree.XMLParser(resolve_entities=False))
+    
+    def _read_package_rels(self, package: zipfile.ZipFile, part_name: str) -> Dict[str, Tuple[str, str]]:
+        """Map a part's relationship ids to (relationship type, target part name)"""
+        directory, name = posixpath.split(part_name)
+        try:
+            rels = self._read_package_xml(package, posixpath.join(directory, '_rels', name + '.rels'))
+        except KeyError:
+            return {}
+        
+        targets = {}
+        for rel in rels.iterchildren(_PACKAGE_RELS + 'Relationship'):
+            if rel.get('TargetMode') == 'External':
+                continue
+            target = rel.get('Target')
+            if target.startswith('/'):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join(directory, target))
+            targets[rel.get('Id')] = (rel.get('Type'), target)
+        return targets
+    
+    def _read_docx_text(self, file_path: Path, include_comments: bool) -> Tuple[List[str], List[str]]:
+        """Extract body paragraph and comment texts straight from the DOCX package XML"""
+        with zipfile.ZipFile(file_path) as package:
+            document = self._read_package_xml(package, 'word/document.xml')
+            comments_root = None
+            if include_comments:
+                try:
+                    comments_root = self._read_package_xml(package, 'word/comments.xml')
+                except KeyError:
+                    pass
+        
+        body = document.find(_W + 'body')
+        paragraphs = [] if body is None else [
+            self._docx_paragraph_text(paragraph) for paragraph in body.iterchildren(_W + 'p')
+        ]
+        comments = [] if comments_root is None else [
+            "\n".join(self._docx_paragraph_text(paragraph) for paragraph in comment.iterchildren(_W + 'p'))
+            for comment in comments_root.iterchildren(_W + 'comment')
+        ]
+        return paragraphs, comments
+    
+    def _docx_paragraph_text(self, paragraph) -> str:
+        """Text of a w:p element as python-docx's Paragraph.text reports it"""
+        parts = []
+        for element in paragraph.iterchildren(_W + 'r', _W + 'hyperlink'):
+            runs = element.iterchildren(_W + 'r') if element.tag == _W + 'hyperlink' else (element,)
+            for run in runs:
+                for child in run:
+                    if child.tag == _W + 't':
+                        parts.append(child.text or "")
+                    elif child.tag == _W + 'br':
+                        # Page and column breaks have no text equivalent
+                        if child.get(_W + 'type', 'textWrapping') == 'textWrapping':
+                            parts.append("\n")
+                    elif child.tag in _DOCX_RUN_TEXT:
+                        parts.append(_DOCX_RUN_TEXT[child.tag])
+        return "".join(parts)
+    
+    def _read_pptx_text(self, file_path: Path, include_notes: bool) -> List[Tuple[List[str], Optional[str]]]:
+        """Extract (shape paragraph texts, speaker notes text) per slide straight from the PPTX package XML"""
+        slides = []
+        with zipfile.ZipFile(file_path) as package:
+            presentation = self._read_package_xml(package, 'ppt/presentation.xml')
+            presentation_rels = self._read_package_rels(package, 'ppt/presentation.xml')
+            
+            slide_ids = presentation.find(_P + 'sldIdLst')
+            for slide_id in (slide_ids.iterchildren(_P + 'sldId') if slide_ids is not None else ()):
+                slide_part = presentation_rels[slide_id.get(_R + 'id')][1]
+                paragraphs = self._pptx_shape_paragraphs(self._read_package_xml(package, slide_part))
+                
+                notes_text = None
+                if include_notes:
+                    for rel_type, target in self._read_package_rels(package, slide_part).values():
+                        if rel_type.endswith('/notesSlide'):
+                            notes_text = self._pptx_notes_text(self._read_package_xml(package, target))
+                            break
+                
+                slides.append((paragraphs, notes_text))
+        return slides
+    
+    def _pptx_shape_paragraphs(self, slide) -> List[str]:
+        """Paragraph texts of a slide's top-level auto shapes, in document order"""
+        texts = []
+        shape_tree = slide.find(f'{_P}cSld/{_P}spTree')
+        if shape_tree is None:
+            return texts
+        
+        for shape in shape_tree.iterchildren(_P + 'sp'):
+            text_body = shape.find(_P + 'txBody')
+            if text_body is None:
+                # python-pptx gives a shape without text an empty one-paragraph frame
+                texts.append("")
+            else:
+                texts.extend(self._pptx_paragraph_text(paragraph) for paragraph in text_body.iterchildren(_A + 'p'))
+        return texts
+    
+    def _pptx_paragraph_text(self, paragraph) -> str:
+        """Text of an a:p element as python-pptx reports it, with line breaks as vertical tabs"""
+        parts = []
+        for child in paragraph:
+            if child.tag == _A + 'br':
+                parts.append("\v")
+            elif child.tag == _A + 'r' or child.tag == _A + 'fld':
+                text = child.findtext(_A + 't')
+                parts.append(text or "")
+        return "".join(parts)
+    
+    def _pptx_notes_text(self, notes_slide) -> Optional[str]:
+        """Text of a notes slide's body placeholder, or None when it has none"""
+        shape_tree = notes_slide.find(f'{_P}cSld/{_P}spTree')
+        if shape_tree is None:
+            return None
+        
+        for shape in shape_tree.iterchildren(_P + 'sp'):
+            placeholder = shape.find(f'{_P}nvSpPr/{_P}nvPr/{_P}ph')
+            if placeholder is not None and placeholder.get('type') == 'body':
+                text_body = shape.find(_P + 'txBody')
+                if text_body is None:
+                    return ""
+                return "\n".join(self._pptx_paragraph_text(paragraph) for paragraph in text_body.iterchildren(_A + 'p'))
+        return None
+    
     def _process_xlsx_file(self, file_path: Path, file_info: FileInfo) -> Tuple[str, List[PIIEntity], Dict[str, int]]:
         """Process XLSX file with advanced features"""
         try:
-            import openpyxl
-            wb = openpyxl.load_workbook(file_path, read_only=True)
+            # Reuse the sheets parsed during analysis instead of reloading the workbook
+            sheets = self._preloaded.pop(self._file_version_key(file_path), None)
+            if sheets is None:
+                sheets = self._read_xlsx_sheets(file_path)
             
             all_entities = []
-            masked_content = ""
+            masked_parts = []
             comments_masked = 0
             
-            for sheet_name in wb.sheetnames:
-                sheet = wb[sheet_name]
-                masked_content += f"Sheet: {sheet_name}\n"
+            for sheet_name, rows, comments in sheets:
+                masked_parts.append(f"Sheet: {sheet_name}\n")
+                
+                # Detect the sheet's cell values in one batch
+                texts = [str(value) for row in rows for value in row if value is not None]
+                results = iter(self.detection_engine.detect_pii_batch(texts, self.config['detection_workers']))
                 
                 # Process cell values
-                for row in sheet.iter_rows(values_only=True):
+                for row in rows:
                     masked_row = []
                     for cell_value in row:
                         if cell_value is not None:
-                            cell_text = str(cell_value)
-                            result = self.detection_engine.detect_pii(cell_text)
+                            result = next(results)
                             all_entities.extend(result.entities_found)
                             masked_row.append(result.masked_content)
                         else:
                             masked_row.append("")
-                    masked_content += ",".join(masked_row) + "\n"
+                    masked_parts.append(",".join(masked_row) + "\n")
                 
                 # Process comments if enabled
                 if self.config['extract_comments']:
-                    # Check for comments in cells
-                    for row in sheet.iter_rows():
-                        for cell in row:
-                            if cell.comment:
-                                comment_text = cell.comment.text
-                                result = self.detection_engine.detect_pii(comment_text)
-                                all_entities.extend(result.entities_found)
-                                comments_masked += 1
+                    for result in self.detection_engine.detect_pii_batch(comments, self.config['detection_workers']):
+                        all_entities.extend(result.entities_found)
+                        comments_masked += 1
             
-            wb.close()
-            return masked_content, all_entities, {
+            return "".join(masked_parts), all_entities, {
                 'comments_masked': comments_masked
             }
         except Exception as e:
@@ -574,27 +1028,41 @@ class FileProcessor:
     def _process_pdf_file(self, file_path: Path, file_info: FileInfo) -> Tuple[str, List[PIIEntity], Dict[str, int]]:
         """Process PDF file with advanced features"""
         try:
-            import fitz
+            # Reuse the document opened during analysis, along with any probed page text
+            preloaded = self._preloaded.pop(self._file_version_key(file_path), None)
+            if preloaded is not None:
+                doc, page_texts = preloaded
+            else:
+                doc, page_texts = _get_fitz().open(str(file_path)), {}
             
-            # Check for image-only PDF
-            if file_info.is_image_only_pdf:
-                raise Exception("Image-only PDF detected - cannot process text content")
+            try:
+                # Check for image-only PDF
+                if file_info.is_image_only_pdf:
+                    raise Exception("Image-only PDF detected - cannot process text content")
+                
+                # PyMuPDF documents are not thread-safe, so extract page text serially
+                pages = []
+                for page_num in range(len(doc)):
+                    page_text = page_texts.get(page_num)
+                    if page_text is None:
+                        page_text = doc.load_page(page_num).get_text()
+                    if page_text.strip():
+                        pages.append((page_num, page_text))
+            finally:
+                doc.close()
             
-            doc = fitz.open(str(file_path))
             all_entities = []
-            masked_content = ""
+            masked_parts = []
             
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                page_text = page.get_text()
-                
-                if page_text.strip():
-                    result = self.detection_engine.detect_pii(page_text)
-                    all_entities.extend(result.entities_found)
-                    masked_content += f"Page {page_num + 1}:\n{result.masked_content}\n\n"
+            results = self.detection_engine.detect_pii_batch(
+                [page_text for _, page_text in pages], self.config['detection_workers']
+            )
             
-            doc.close()
-            return masked_content, all_entities, {}
+            for (page_num, _), result in zip(pages, results):
+                all_entities.extend(result.entities_found)
+                masked_parts.append(f"Page {page_num + 1}:\n{result.masked_content}\n\n")
+            
+            return "".join(masked_parts), all_entities, {}
         except Exception as e:
             raise Exception(f"Error processing PDF file: {e}")
     
@@ -622,6 +1090,19 @@ class FileProcessor:
         """Check if a file can be processed"""
         return Path(file_path).suffix.lower() in self.supported_types
 
+# FileProcessor owned by a process_files_parallel worker process
+_worker_processor: Optional[FileProcessor] = None
+
+def _init_worker(engine_config: Dict[str, Any], processor_config: Dict[str, Any]) -> None:
+    """Build the worker's detection engine once, before it receives any files"""
+    global _worker_processor
+    _worker_processor = FileProcessor(PIIDetectionEngine(engine_config))
+    _worker_processor.config.update(processor_config)
+
+def _process_in_worker(file_path: str) -> ProcessingResult:
+    """Process one file with the worker's shared engine"""
+    return _worker_processor.process_file(file_path)
+
 # Test the file processor
 if __name__ == "__main__":
     # Create a test CSV file
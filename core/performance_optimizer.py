@@ -4,15 +4,42 @@ Performance Optimizer for Cloak & Style
 Implements caps enforcement and memory management for laptop-grade equipment
 """
 
+import gc
 import os
+import re
+import mmap
+import pickle
 import psutil
 import time
 import threading
+import zipfile
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from xml.etree.ElementTree import iterparse
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 import logging
 
+# NumPy screens large batches for missing/oversized files in one pass when installed
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Worksheet parts and the last row of a <dimension ref="A1:X123"/> range
+_WORKSHEET_PART = re.compile(r'xl/worksheets/[^/]+\.xml$')
+_DIMENSION_LAST_ROW = re.compile(r'[A-Z]+(\d+)$')
+
+# Classic PDF trailer/catalog/page-tree entries; xref-stream files fall back to a parser
+_PDF_TRAILER_ROOT = re.compile(rb'trailer\s*<<.{0,2048}?/Root\s+(\d+)\s+(\d+)\s+R', re.DOTALL)
+_PDF_PAGES_REF = re.compile(rb'/Pages\s+(\d+)\s+(\d+)\s+R')
+_PDF_PAGE_COUNT = re.compile(rb'/Count\s+(\d+)')
+
+# One monitoring tick, published by the monitor thread with a single attribute store
+_Sample = namedtuple('_Sample', ['memory_mb', 'cpu_percent', 'peak_memory_mb', 'peak_cpu_percent'])
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -50,21 +77,52 @@ class PerformanceMetrics:
     memory_peak_mb: float = 0.0
     cpu_peak_percent: float = 0.0
 
+@dataclass(frozen=True, slots=True)
+class PerformanceSnapshot:
+    """Consistent point-in-time view of the metrics used for summaries"""
+    processing_time: float
+    file_count: int
+    total_entities: int
+    memory_peak_mb: float
+    cpu_peak_percent: float
+
 class PerformanceOptimizer:
     """Performance optimization and monitoring for laptop-grade equipment"""
     
+    # Extension -> (counter method, cap attribute, error message, minimum bytes per unit).
+    # Files smaller than cap * minimum bytes cannot exceed the cap and skip counting;
+    # every counted CSV row ends in a newline byte, while compressed XLSX/PDF parts
+    # give no size-based bound.
+    _COUNTERS = {
+        '.csv': ('_count_csv_rows', 'max_csv_rows', "CSV row count ({count:,}) exceeds cap ({cap:,})", 1),
+        '.xlsx': ('_count_xlsx_rows', 'max_xlsx_rows', "XLSX row count ({count:,}) exceeds cap ({cap:,})", None),
+        '.pdf': ('_count_pdf_pages', 'max_pdf_pages', "PDF page count ({count}) exceeds cap ({cap})", None),
+    }
+    
+    # Row/page counts keyed by (counter, path, mtime_ns, size), shared across instances
+    # and evicted least-recently-used; a changed file gets a new key
+    COUNT_CACHE_SIZE = 4096
+    _count_cache = OrderedDict()
+    _count_cache_lock = threading.Lock()
+    
     def __init__(self, caps: Optional[PerformanceCaps] = None):
         self.caps = caps or PerformanceCaps()
         self.metrics = None
+        self._snapshot = None  # Final snapshot, published by stop_monitoring()
         self.monitoring = False
         self.monitor_thread = None
         self.stop_monitoring_event = threading.Event()
         
-        # Performance tracking
-        self.current_memory_mb = 0
-        self.current_cpu_percent = 0
-        self.peak_memory_mb = 0
-        self.peak_cpu_percent = 0
+        # Performance tracking; only the monitor thread replaces the sample
+        self._sample = _Sample(0, 0, 0, 0)
+        
+        # Reused handles for monitoring; total RAM doesn't change while running
+        self._process = psutil.Process()
+        self._total_memory_mb = psutil.virtual_memory().total / (1024 * 1024)
+        self._memory_percent_cap_mb = self.caps.max_memory_percent * self._total_memory_mb / 100.0
+        
+        # Prime the non-blocking CPU counter so the first sample covers time since now
+        psutil.cpu_percent(interval=None)
     
     def start_monitoring(self) -> PerformanceMetrics:
         """Start performance monitoring"""
@@ -75,6 +133,7 @@ class PerformanceOptimizer:
         self.stop_monitoring_event.clear()
         
         # Initialize metrics
+        self._snapshot = None
         self.metrics = PerformanceMetrics(
             start_time=time.time(),
             memory_start_mb=self._get_memory_usage_mb(),
@@ -89,6 +148,22 @@ class PerformanceOptimizer:
         logger.info("Performance monitoring started")
         return self.metrics
     
+    @property
+    def current_memory_mb(self) -> float:
+        return self._sample.memory_mb
+    
+    @property
+    def current_cpu_percent(self) -> float:
+        return self._sample.cpu_percent
+    
+    @property
+    def peak_memory_mb(self) -> float:
+        return self._sample.peak_memory_mb
+    
+    @property
+    def peak_cpu_percent(self) -> float:
+        return self._sample.peak_cpu_percent
+    
     def stop_monitoring(self) -> Optional[PerformanceMetrics]:
         """Stop performance monitoring and return final metrics"""
         if not self.monitoring:
@@ -101,85 +176,140 @@ class PerformanceOptimizer:
         self.monitoring = False
         
         if self.metrics:
-            self.metrics.processing_time = time.time() - self.metrics.start_time
-            self.metrics.memory_peak_mb = self.peak_memory_mb
-            self.metrics.cpu_peak_percent = self.peak_cpu_percent
+            # Publish the final snapshot first so summaries never mix old and new fields
+            snapshot = self._take_snapshot()
+            self._snapshot = snapshot
+            self.metrics.processing_time = snapshot.processing_time
+            self.metrics.memory_peak_mb = snapshot.memory_peak_mb
+            self.metrics.cpu_peak_percent = snapshot.cpu_peak_percent
         
         logger.info("Performance monitoring stopped")
         return self.metrics
     
     def _monitor_performance(self):
         """Background thread for performance monitoring"""
+        peak_memory_mb = self._sample.peak_memory_mb
+        peak_cpu_percent = self._sample.peak_cpu_percent
+        
+        # Back off from 0.5s to 5s while memory stays well under the cap
+        interval = 0.5
+        busy_memory_mb = 0.7 * self.caps.max_memory_mb
+        
         while not self.stop_monitoring_event.is_set():
             try:
-                # Update current metrics
-                self.current_memory_mb = self._get_memory_usage_mb()
-                self.current_cpu_percent = self._get_cpu_usage_percent()
+                memory_mb = self._get_memory_usage_mb()
+                cpu_percent = self._get_cpu_usage_percent()
                 
-                # Track peaks
-                self.peak_memory_mb = max(self.peak_memory_mb, self.current_memory_mb)
-                self.peak_cpu_percent = max(self.peak_cpu_percent, self.current_cpu_percent)
+                # Track peaks locally and publish the whole sample at once
+                if memory_mb > peak_memory_mb:
+                    peak_memory_mb = memory_mb
+                if cpu_percent > peak_cpu_percent:
+                    peak_cpu_percent = cpu_percent
+                sample = _Sample(memory_mb, cpu_percent, peak_memory_mb, peak_cpu_percent)
+                self._sample = sample
                 
                 # Check for violations
-                self._check_performance_violations()
+                self._check_performance_violations(sample)
                 
-                time.sleep(1)  # Monitor every second
+                if memory_mb > busy_memory_mb:
+                    interval = 0.5
+                else:
+                    interval = min(interval * 2, 5.0)
+                
+                # Returns as soon as stop_monitoring() sets the event
+                self.stop_monitoring_event.wait(interval)
                 
             except Exception as e:
                 logger.error(f"Error in performance monitoring: {e}")
                 break
     
-    def _check_performance_violations(self):
+    def _check_performance_violations(self, sample: Optional[_Sample] = None):
         """Check for performance violations"""
+        sample = sample or self._sample
+        
         # Memory violations
-        if self.current_memory_mb > self.caps.max_memory_mb:
-            logger.warning(f"Memory usage ({self.current_memory_mb:.1f}MB) exceeds cap ({self.caps.max_memory_mb}MB)")
+        if sample.memory_mb > self.caps.max_memory_mb:
+            logger.warning(f"Memory usage ({sample.memory_mb:.1f}MB) exceeds cap ({self.caps.max_memory_mb}MB)")
         
-        memory_percent = (self.current_memory_mb / self._get_total_memory_mb()) * 100
-        if memory_percent > self.caps.max_memory_percent:
+        # Compare against the precomputed MB equivalent; the percentage is only needed for the message
+        if sample.memory_mb > self._memory_percent_cap_mb:
+            memory_percent = (sample.memory_mb / self._total_memory_mb) * 100
             logger.warning(f"Memory usage ({memory_percent:.1f}%) exceeds cap ({self.caps.max_memory_percent}%)")
         
         # CPU violations
-        if self.current_cpu_percent > 90:  # High CPU usage
-            logger.warning(f"High CPU usage detected: {self.current_cpu_percent:.1f}%")
+        if sample.cpu_percent > 90:  # High CPU usage
+            logger.warning(f"High CPU usage detected: {sample.cpu_percent:.1f}%")
     
     def validate_file_caps(self, file_path: str) -> Tuple[bool, List[str]]:
         """Validate file against performance caps"""
+        file_path = os.fspath(file_path)
+        
+        # One stat covers the existence and size checks
+        return self._validate_file_stat(file_path, self._stat_or_none(file_path))
+    
+    @staticmethod
+    def _stat_or_none(file_path: str) -> Optional[os.stat_result]:
+        try:
+            return os.stat(file_path)
+        except FileNotFoundError:
+            return None
+    
+    def _validate_file_stat(self, file_path: str, stat: Optional[os.stat_result]) -> Tuple[bool, List[str]]:
+        """Validate an already-stat'ed file against performance caps"""
         errors = []
-        file_path = Path(file_path)
         
-        if not file_path.exists():
+        if stat is None:
             errors.append(f"File not found: {file_path}")
             return False, errors
         
-        # File size check
-        file_size_mb = file_path.stat().st_size / (1024 * 1024)
-        if file_size_mb > self.caps.max_file_mb:
+        # File size check; an oversized file has already failed, so its rows/pages aren't counted
+        file_size_mb = stat.st_size / (1024 * 1024)
+        oversized = file_size_mb > self.caps.max_file_mb
+        if oversized:
             errors.append(f"File size ({file_size_mb:.1f}MB) exceeds cap ({self.caps.max_file_mb}MB)")
         
-        # File type specific checks
-        file_extension = file_path.suffix.lower()
-        
-        if file_extension == '.csv':
-            row_count = self._count_csv_rows(file_path)
-            if row_count > self.caps.max_csv_rows:
-                errors.append(f"CSV row count ({row_count:,}) exceeds cap ({self.caps.max_csv_rows:,})")
+        # File type specific checks; splitext works on the raw string, unlike
+        # rpartition('.') it ignores dots in directory names
+        file_extension = os.path.splitext(file_path)[1].lower()
+        counter = self._COUNTERS.get(file_extension)
         
-        elif file_extension == '.xlsx':
-            row_count = self._count_xlsx_rows(file_path)
-            if row_count > self.caps.max_xlsx_rows:
-                errors.append(f"XLSX row count ({row_count:,}) exceeds cap ({self.caps.max_xlsx_rows:,})")
+        if counter and not oversized:
+            counter_name, cap_name, message, min_bytes = counter
+            cap = getattr(self.caps, cap_name)
+            if min_bytes is None or stat.st_size >= cap * min_bytes:
+                count = self._count_cached(counter_name, file_path, stat)
+                if count > cap:
+                    errors.append(message.format(count=count, cap=cap))
         
-        elif file_extension == '.pdf':
-            page_count = self._count_pdf_pages(file_path)
-            if page_count > self.caps.max_pdf_pages:
-                errors.append(f"PDF page count ({page_count}) exceeds cap ({self.caps.max_pdf_pages})")
-            
+        if file_extension == '.pdf':
             if file_size_mb > self.caps.max_pdf_mb:
                 errors.append(f"PDF file size ({file_size_mb:.1f}MB) exceeds cap ({self.caps.max_pdf_mb}MB)")
         
         return len(errors) == 0, errors
     
+    def _count_cached(self, counter_name: str, file_path: str, stat: os.stat_result) -> int:
+        """Run a row/page counter, reusing the result for an unchanged file"""
+        key = (counter_name, file_path, stat.st_mtime_ns, stat.st_size)
+        cache = self._count_cache
+        with self._count_cache_lock:
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+        
+        count = getattr(self, counter_name)(file_path)
+        
+        with self._count_cache_lock:
+            cache[key] = count
+            if len(cache) > self.COUNT_CACHE_SIZE:
+                cache.popitem(last=False)
+        return count
+    
+    @classmethod
+    def clear_count_caches(cls):
+        """Forget all memoized row/page counts"""
+        with cls._count_cache_lock:
+            cls._count_cache.clear()
+    
     def validate_batch_caps(self, file_paths: List[str]) -> Tuple[bool, List[str]]:
         """Validate batch processing against caps"""
         errors = []
@@ -188,9 +318,34 @@ class PerformanceOptimizer:
         if len(file_paths) > self.caps.max_batch_files:
             errors.append(f"Batch size ({len(file_paths)}) exceeds cap ({self.caps.max_batch_files})")
         
-        # Individual file checks
-        for file_path in file_paths:
-            is_valid, file_errors = self.validate_file_caps(file_path)
+        paths = [os.fspath(file_path) for file_path in file_paths]
+        stats = [self._stat_or_none(path) for path in paths]
+        file_results = [None] * len(paths)
+        
+        # Missing and oversized files fail on their stat alone; screen them
+        # with array compares so only survivors reach row/page counting
+        if np is not None and len(paths) > 4:
+            sizes = np.fromiter((stat.st_size if stat else -1 for stat in stats),
+                                dtype=np.int64, count=len(stats))
+            rejected = (sizes < 0) | (sizes > self.caps.max_file_mb * (1 << 20))
+            for index in np.flatnonzero(rejected):
+                file_results[index] = self._validate_file_stat(paths[index], stats[index])
+        
+        # Individual file checks; row/page counting is mostly I/O, so larger
+        # batches are validated on a few threads (results keep input order)
+        pending = [index for index, result in enumerate(file_results) if result is None]
+        if len(pending) > 4:
+            with ThreadPoolExecutor(max_workers=self._calculate_optimal_concurrency()) as executor:
+                checked = executor.map(self._validate_file_stat,
+                                       [paths[index] for index in pending],
+                                       [stats[index] for index in pending])
+                for index, result in zip(pending, checked):
+                    file_results[index] = result
+        else:
+            for index in pending:
+                file_results[index] = self._validate_file_stat(paths[index], stats[index])
+        
+        for is_valid, file_errors in file_results:
             if not is_valid:
                 errors.extend(file_errors)
         
@@ -266,70 +421,99 @@ class PerformanceOptimizer:
     
     def get_performance_summary(self) -> Dict[str, Any]:
         """Get current performance summary"""
-        if not self.metrics:
+        snapshot = self._snapshot or self._take_snapshot()
+        if not snapshot:
             return {}
         
         return {
-            'processing_time_seconds': self.metrics.processing_time,
-            'files_processed': self.metrics.file_count,
-            'total_entities': self.metrics.total_entities,
-            'memory_peak_mb': self.metrics.memory_peak_mb,
-            'cpu_peak_percent': self.metrics.cpu_peak_percent,
-            'memory_efficiency': self._calculate_memory_efficiency(),
-            'performance_score': self._calculate_performance_score()
+            'processing_time_seconds': snapshot.processing_time,
+            'files_processed': snapshot.file_count,
+            'total_entities': snapshot.total_entities,
+            'memory_peak_mb': snapshot.memory_peak_mb,
+            'cpu_peak_percent': snapshot.cpu_peak_percent,
+            'memory_efficiency': self._calculate_memory_efficiency(snapshot),
+            'performance_score': self._calculate_performance_score(snapshot)
         }
     
-    def _calculate_memory_efficiency(self) -> float:
+    def _take_snapshot(self) -> Optional[PerformanceSnapshot]:
+        """Read the running metrics and the latest monitor sample once each"""
+        metrics = self.metrics
+        if not metrics:
+            return None
+        
+        sample = self._sample
+        return PerformanceSnapshot(
+            processing_time=time.time() - metrics.start_time,
+            file_count=metrics.file_count,
+            total_entities=metrics.total_entities,
+            memory_peak_mb=sample.peak_memory_mb,
+            cpu_peak_percent=sample.peak_cpu_percent
+        )
+    
+    def _calculate_memory_efficiency(self, snapshot: PerformanceSnapshot) -> float:
         """Calculate memory efficiency (lower is better)"""
-        if not self.metrics or self.metrics.processing_time == 0:
+        if snapshot.processing_time == 0:
             return 0.0
         
         # MB-seconds per entity (lower is better)
-        return (self.metrics.memory_peak_mb * self.metrics.processing_time) / max(1, self.metrics.total_entities)
+        return (snapshot.memory_peak_mb * snapshot.processing_time) / max(1, snapshot.total_entities)
     
-    def _calculate_performance_score(self) -> float:
+    def _calculate_performance_score(self, snapshot: PerformanceSnapshot) -> float:
         """Calculate overall performance score (0-100)"""
-        if not self.metrics:
-            return 0.0
-        
         # Factors: processing speed, memory efficiency, CPU usage
-        speed_score = min(100, (1000 / max(1, self.metrics.processing_time)))  # Faster = higher score
-        memory_score = max(0, 100 - (self.metrics.memory_peak_mb / 100))  # Less memory = higher score
-        cpu_score = max(0, 100 - self.metrics.cpu_peak_percent)  # Less CPU = higher score
+        speed_score = min(100, (1000 / max(1, snapshot.processing_time)))  # Faster = higher score
+        memory_score = max(0, 100 - (snapshot.memory_peak_mb / 100))  # Less memory = higher score
+        cpu_score = max(0, 100 - snapshot.cpu_peak_percent)  # Less CPU = higher score
         
         return (speed_score * 0.4 + memory_score * 0.3 + cpu_score * 0.3)
     
     # System monitoring methods
     def _get_memory_usage_mb(self) -> float:
         """Get current memory usage in MB"""
-        process = psutil.Process()
-        return process.memory_info().rss / (1024 * 1024)
+        return self._process.memory_info().rss / (1024 * 1024)
     
     def _get_total_memory_mb(self) -> float:
         """Get total system memory in MB"""
-        return psutil.virtual_memory().total / (1024 * 1024)
+        return self._total_memory_mb
     
     def _get_available_memory_mb(self) -> float:
         """Get available system memory in MB"""
         return psutil.virtual_memory().available / (1024 * 1024)
     
     def _get_cpu_usage_percent(self) -> float:
-        """Get current CPU usage percentage"""
-        return psutil.cpu_percent(interval=0.1)
+        """Get CPU usage percentage since the previous sample (non-blocking)"""
+        return psutil.cpu_percent(interval=None)
     
     # File analysis methods
     def _count_csv_rows(self, file_path: Path) -> int:
-        """Count rows in CSV file"""
+        """Count rows in CSV file (physical lines, an upper bound when quoted cells span lines)"""
         try:
-            import csv
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return sum(1 for _ in csv.reader(f))
+            # bytes.count scans in C, so no rows are parsed and any encoding works
+            total = 0
+            last_chunk = b''
+            with open(file_path, 'rb') as f:
+                while chunk := f.read(1 << 20):
+                    total += chunk.count(b'\n')
+                    last_chunk = chunk
+            
+            # A final row without a trailing newline still counts
+            if last_chunk and not last_chunk.endswith(b'\n'):
+                total += 1
+            return total
         except Exception as e:
             logger.warning(f"Could not count CSV rows: {e}")
             return 0
     
     def _count_xlsx_rows(self, file_path: Path) -> int:
         """Count rows in XLSX file"""
+        try:
+            return self._count_xlsx_rows_from_dimensions(file_path)
+        except (KeyError, ValueError, zipfile.BadZipFile):
+            pass  # No usable <dimension>; let openpyxl work it out
+        except Exception as e:
+            logger.warning(f"Could not count XLSX rows: {e}")
+            return 0
+        
         try:
             import openpyxl
             wb = openpyxl.load_workbook(file_path, read_only=True)
@@ -342,8 +526,51 @@ class PerformanceOptimizer:
             logger.warning(f"Could not count XLSX rows: {e}")
             return 0
     
+    def _count_xlsx_rows_from_dimensions(self, file_path: Path) -> int:
+        """Sum the declared <dimension> of every worksheet, reading only the start of each part"""
+        total_rows = 0
+        with zipfile.ZipFile(file_path) as package:
+            for name in package.namelist():
+                if not _WORKSHEET_PART.match(name):
+                    continue
+                
+                last_row = None
+                with package.open(name) as part:
+                    for _, element in iterparse(part, events=('start',)):
+                        local_name = element.tag.rpartition('}')[2]
+                        if local_name == 'dimension':
+                            match = _DIMENSION_LAST_ROW.search(element.get('ref', ''))
+                            last_row = int(match.group(1)) if match else None
+                            break
+                        if local_name == 'sheetData':
+                            break  # <dimension> always precedes the cell data
+                
+                if last_row is None:
+                    raise ValueError(f"{name} has no dimension")
+                total_rows += last_row
+        
+        return total_rows
+    
     def _count_pdf_pages(self, file_path: Path) -> int:
         """Count pages in PDF file"""
+        try:
+            page_count = self._count_pdf_pages_raw(file_path)
+            if page_count is not None:
+                return page_count
+        except (OSError, ValueError):
+            pass
+        
+        try:
+            import pikepdf
+        except ImportError:
+            pikepdf = None
+        if pikepdf is not None:
+            try:
+                with pikepdf.open(file_path) as pdf:
+                    return len(pdf.pages)
+            except Exception:
+                pass  # Leave it to MuPDF, which repairs more damage
+        
         try:
             import fitz
             doc = fitz.open(str(file_path))
@@ -354,15 +581,57 @@ class PerformanceOptimizer:
             logger.warning(f"Could not count PDF pages: {e}")
             return 0
 
+    def _count_pdf_pages_raw(self, file_path: Path) -> Optional[int]:
+        """Read /Count of the root page tree straight from the file, or None if it can't be found"""
+        with open(file_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # The last trailer wins after incremental updates
+                root = None
+                for root in _PDF_TRAILER_ROOT.finditer(mm):
+                    pass
+                if root is None:
+                    return None
+                
+                catalog = self._find_pdf_object(mm, root.group(1), root.group(2))
+                pages = _PDF_PAGES_REF.search(catalog) if catalog else None
+                if pages is None:
+                    return None
+                
+                page_tree = self._find_pdf_object(mm, pages.group(1), pages.group(2))
+                count = _PDF_PAGE_COUNT.search(page_tree) if page_tree else None
+                return int(count.group(1)) if count else None
+    
+    def _find_pdf_object(self, mm: mmap.mmap, number: bytes, generation: bytes) -> Optional[bytes]:
+        """Body of the last definition of an indirect object, or None if it lives in an object stream"""
+        header = None
+        pattern = re.compile(rb'(?<!\d)' + number + rb'\s+' + generation + rb'\s+obj\b')
+        for header in pattern.finditer(mm):
+            pass
+        if header is None:
+            return None
+        
+        end = mm.find(b'endobj', header.end())
+        return mm[header.end():end] if end != -1 else None
+
 class LaptopOptimizedProcessor:
     """Laptop-optimized file processor with performance monitoring"""
     
+    # Collect once RSS has grown this much since the last collection
+    GC_GROWTH_MB = 200
+    
     def __init__(self, caps: Optional[PerformanceCaps] = None):
         self.optimizer = PerformanceOptimizer(caps)
         self.optimizations = self.optimizer.optimize_for_laptop()
+        self._last_gc_memory_mb = self.optimizer._get_memory_usage_mb()
     
-    def process_files(self, file_paths: List[str], processor_func) -> List[Any]:
-        """Process files with laptop optimizations"""
+    def process_files(self, file_paths: List[str], processor_func, cpu_bound: bool = True) -> List[Any]:
+        """Process files with laptop optimizations
+        
+        With the parallel_limited strategy and cpu_bound=True, files are processed
+        in worker processes so CPU-bound work is not serialized on the GIL. This
+        requires processor_func to be picklable (a module-level function); lambdas
+        and closures fall back to a thread pool.
+        """
         # Validate batch
         is_valid, errors = self.optimizer.validate_batch_caps(file_paths)
         if not is_valid:
@@ -372,19 +641,14 @@ class LaptopOptimizedProcessor:
         self.optimizer.start_monitoring()
         
         try:
-            results = []
             strategy = self.optimizations['processing_strategy']
+            options = {
+                'sequential_streaming': {'gc_every': 1},
+                'sequential_buffered': {'gc_every': self.optimizations['batch_size']},
+                'parallel_limited': {'parallel': True, 'cpu_bound': cpu_bound},
+            }.get(strategy, {})  # sequential_optimized
             
-            if strategy == "sequential_streaming":
-                results = self._process_sequential_streaming(file_paths, processor_func)
-            elif strategy == "sequential_buffered":
-                results = self._process_sequential_buffered(file_paths, processor_func)
-            elif strategy == "parallel_limited":
-                results = self._process_parallel_limited(file_paths, processor_func)
-            else:  # sequential_optimized
-                results = self._process_sequential_optimized(file_paths, processor_func)
-            
-            return results
+            return self._run(file_paths, processor_func, **options)
             
         finally:
             # Stop monitoring and get metrics
@@ -394,88 +658,63 @@ class LaptopOptimizedProcessor:
                           f"{metrics.total_entities} entities, "
                           f"{metrics.processing_time:.2f}s")
     
-    def _process_sequential_streaming(self, file_paths: List[str], processor_func) -> List[Any]:
-        """Process files sequentially with streaming for low memory"""
-        results = []
-        for file_path in file_paths:
-            try:
-                result = processor_func(file_path)
-                results.append(result)
-                self.optimizer.metrics.file_count += 1
-                
-                # Force garbage collection after each file
-                import gc
-                gc.collect()
-                
-            except Exception as e:
-                logger.error(f"Error processing {file_path}: {e}")
-                results.append({'error': str(e), 'file': file_path})
+    def _run(self, file_paths: List[str], processor_func, *, parallel: bool = False,
+             cpu_bound: bool = True, gc_every: Optional[int] = None) -> List[Any]:
+        """Process files for any strategy
         
-        return results
-    
-    def _process_sequential_buffered(self, file_paths: List[str], processor_func) -> List[Any]:
-        """Process files sequentially with buffering"""
+        parallel runs processor_func on a limited worker pool; results keep input order.
+        gc_every checks memory growth after every N files (1 for streaming, the
+        batch size for buffered) and collects garbage when it has grown.
+        """
         results = []
-        batch_size = self.optimizations['batch_size']
+        append = results.append
+        metrics = self.optimizer.metrics
+        total = len(file_paths)
+        executor = None
+        
+        if parallel:
+            use_processes = cpu_bound and self._is_picklable(processor_func)
+            executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            executor = executor_class(max_workers=self.optimizations['concurrency'])
+            # Metrics live in this process, so count files as futures complete
+            calls = [(file_path, executor.submit(processor_func, file_path).result) for file_path in file_paths]
+        else:
+            calls = [(file_path, partial(processor_func, file_path)) for file_path in file_paths]
         
-        for i in range(0, len(file_paths), batch_size):
-            batch = file_paths[i:i + batch_size]
-            
-            for file_path in batch:
+        try:
+            for index, (file_path, call) in enumerate(calls, 1):
                 try:
-                    result = processor_func(file_path)
-                    results.append(result)
-                    self.optimizer.metrics.file_count += 1
+                    append(call())
+                    metrics.file_count += 1
                     
                 except Exception as e:
                     logger.error(f"Error processing {file_path}: {e}")
-                    results.append({'error': str(e), 'file': file_path})
-            
-            # Garbage collection between batches
-            import gc
-            gc.collect()
+                    append({'error': str(e), 'file': file_path})
+                
+                if gc_every and (index % gc_every == 0 or index == total):
+                    self._collect_garbage_if_needed()
+        finally:
+            if executor:
+                executor.shutdown()
         
         return results
     
-    def _process_parallel_limited(self, file_paths: List[str], processor_func) -> List[Any]:
-        """Process files with limited parallelism"""
-        import concurrent.futures
-        
-        max_workers = self.optimizations['concurrency']
-        results = []
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_file = {executor.submit(processor_func, file_path): file_path 
-                            for file_path in file_paths}
-            
-            for future in concurrent.futures.as_completed(future_to_file):
-                file_path = future_to_file[future]
-                try:
-                    result = future.result()
-                    results.append(result)
-                    self.optimizer.metrics.file_count += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error processing {file_path}: {e}")
-                    results.append({'error': str(e), 'file': file_path})
-        
-        return results
+    def _collect_garbage_if_needed(self):
+        """Run a full collection only after significant RSS growth or near the memory cap"""
+        current_mb = self.optimizer._get_memory_usage_mb()
+        if (current_mb - self._last_gc_memory_mb > self.GC_GROWTH_MB or
+                current_mb > 0.75 * self.optimizer.caps.max_memory_mb):
+            gc.collect()
+            self._last_gc_memory_mb = self.optimizer._get_memory_usage_mb()
     
-    def _process_sequential_optimized(self, file_paths: List[str], processor_func) -> List[Any]:
-        """Process files with optimized sequential processing"""
-        results = []
-        
-        for file_path in file_paths:
-            try:
-                result = processor_func(file_path)
-                results.append(result)
-                self.optimizer.metrics.file_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error processing {file_path}: {e}")
-                results.append({'error': str(e), 'file': file_path})
-        
-        return results
+    @staticmethod
+    def _is_picklable(func) -> bool:
+        """Check whether a processor function can be sent to a worker process"""
+        try:
+            pickle.dumps(func)
+            return True
+        except Exception:
+            return False
     
     def get_performance_summary(self) -> Dict[str, Any]:
         """Get performance summary"""
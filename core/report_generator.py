@@ -7,10 +7,17 @@ Generates HTML, JSON, and CSV reports for PII processing results
 import json
 import csv
 import os
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from html import escape
+from itertools import chain
+from operator import attrgetter
 from pathlib import Path
 from typing import Dict, List, Any, Optional
-from dataclasses import asdict, is_dataclass
+from dataclasses import dataclass, fields, is_dataclass
 
 try:
     from .detection_engine import PIIEntity, DetectionResult
@@ -21,34 +28,146 @@ except ImportError:
     from file_processor import ProcessingResult
     from document_modifier import ModificationResult
 
+# orjson's C encoder is used for the JSON report when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# NumPy buckets confidences in one vectorized call when installed
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# File names used by generate_all() for each report format
+_REPORT_FILENAMES = {
+    'html': "cloak_and_style_report.html",
+    'json': "cloak_and_style_report.json",
+    'csv': "cloak_and_style_findings.csv",
+}
+
+# Report files are written through a 1 MiB buffer so large reports need few write() calls
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# Confidence histogram bins; bisect_right/searchsorted(side='right') on the bounds
+# matches "conf < upper" per bin, with anything at or above 0.8 in the last bin
+_CONFIDENCE_BOUNDS = (0.2, 0.4, 0.6, 0.8)
+_CONFIDENCE_LABELS = ('0.0-0.2', '0.2-0.4', '0.4-0.6', '0.6-0.8', '0.8-1.0')
+
+# Values that serialize as-is and need no conversion
+_SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
+
+@lru_cache(maxsize=None)
+def _dataclass_field_names(cls) -> tuple:
+    """Field names of a dataclass type, looked up once per type"""
+    return tuple(f.name for f in fields(cls))
+
+class _FormattedConfidences(dict):
+    """Memo of confidence -> "%.3f" string; detectors emit only a few distinct scores"""
+    
+    def __missing__(self, confidence):
+        formatted = self[confidence] = f"{confidence:.3f}"
+        return formatted
+
+@dataclass
+class _Stats:
+    """Aggregates shared by the HTML and JSON reports, built in one pass over results
+    
+    file_summary is only rendered into HTML, so its text fields are stored escaped.
+    """
+    total_files: int
+    total_entities: int
+    total_questionable: int
+    total_residual: int
+    entity_summary: Dict[str, int]
+    confidence_histogram: Dict[str, int]
+    file_summary: List[Dict[str, Any]]
+
 class ReportGenerator:
     """Generates comprehensive reports for PII processing results"""
     
+    # One file-details row, filled from a file summary entry with format_map
+    _ROW_TMPL = """
+            <tr>
+                <td>{filename}</td>
+                <td>{file_type}</td>
+                <td>{size_str}</td>
+                <td>{entities_found}</td>
+                <td>{questionable_entities}</td>
+                <td>{residual_entities}</td>
+                <td>{time_str}</td>
+                <td class="{status_class}">{status}</td>
+            </tr>
+            """
+    
     def __init__(self):
-        self.html_template = self._get_html_template()
-        self.css_styles = self._get_css_styles()
+        self.html_template = _HTML_TEMPLATE
+        self.css_styles = _CSS_STYLES
     
     def generate_html_report(self, results: List[ProcessingResult], 
                            config: Dict[str, Any], output_path: str) -> str:
         """Generate human-readable HTML report"""
+        return self._render_html(results, self._compute_stats(results), config, output_path)
+    
+    def generate_json_report(self, results: List[ProcessingResult], 
+                           config: Dict[str, Any], output_path: str) -> str:
+        """Generate machine-readable JSON report"""
+        return self._render_json(results, self._compute_stats(results), config, output_path)
+    
+    def generate_csv_findings(self, results: List[ProcessingResult], 
+                            output_path: str) -> str:
+        """Generate CSV findings report"""
+        return self._render_csv(results, output_path)
+    
+    def generate_all(self, results: List[ProcessingResult], config: Dict[str, Any], output_dir: str,
+                     formats: List[str] = ('html', 'json', 'csv')) -> Dict[str, str]:
+        """Generate several report formats from one stats pass, rendering them concurrently
         
+        Returns a mapping of format to written path.
+        """
+        formats = [fmt for fmt in _REPORT_FILENAMES if fmt in formats]
+        if not formats:
+            return {}
+        
+        stats = self._compute_stats(results) if 'html' in formats or 'json' in formats else None
+        paths = {fmt: os.path.join(output_dir, _REPORT_FILENAMES[fmt]) for fmt in formats}
+        
+        with ThreadPoolExecutor(max_workers=len(formats)) as executor:
+            futures = {}
+            if 'html' in paths:
+                futures['html'] = executor.submit(self._render_html, results, stats, config, paths['html'])
+            if 'json' in paths:
+                futures['json'] = executor.submit(self._render_json, results, stats, config, paths['json'])
+            if 'csv' in paths:
+                futures['csv'] = executor.submit(self._render_csv, results, paths['csv'])
+            
+            return {fmt: future.result() for fmt, future in futures.items()}
+    
+    def _render_html(self, results: List[ProcessingResult], stats: _Stats,
+                     config: Dict[str, Any], output_path: str) -> str:
+        """Render and write the HTML report from precomputed stats"""
         # Prepare data for HTML template
         report_data = {
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'total_files': len(results),
-            'total_entities': sum(len(r.entities_found) for r in results),
-            'total_questionable': sum(len(r.questionable_entities) for r in results),
-            'total_residual': sum(len(r.residual_entities) for r in results),
+            'timestamp': datetime.now().isoformat(sep=' ', timespec='seconds'),
+            'total_files': stats.total_files,
+            'total_entities': stats.total_entities,
+            'total_questionable': stats.total_questionable,
+            'total_residual': stats.total_residual,
             'config_snapshot': config,
             'results': results,
-            'entity_summary': self._generate_entity_summary(results),
-            'confidence_histogram': self._generate_confidence_histogram(results),
-            'file_summary': self._generate_file_summary(results)
+            'entity_summary': stats.entity_summary,
+            'confidence_histogram': stats.confidence_histogram,
+            'file_summary': stats.file_summary
         }
         
-        # Generate HTML content
-        html_content = self.html_template.format(
-            css_styles=self.css_styles,
+        # Generate HTML content; the stock template and CSS are pre-joined at import
+        if self.html_template is _HTML_TEMPLATE and self.css_styles is _CSS_STYLES:
+            template, template_fields = _HTML_SKELETON, {}
+        else:
+            template, template_fields = self.html_template, {'css_styles': self.css_styles}
+        html_content = template.format(
+            **template_fields,
             timestamp=report_data['timestamp'],
             total_files=report_data['total_files'],
             total_entities=report_data['total_entities'],
@@ -61,17 +180,19 @@ class ReportGenerator:
         )
         
         # Write to file
-        with open(output_path, 'w', encoding='utf-8') as f:
+        with open(output_path, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
             f.write(html_content)
         
         return output_path
     
-    def generate_json_report(self, results: List[ProcessingResult], 
-                           config: Dict[str, Any], output_path: str) -> str:
-        """Generate machine-readable JSON report"""
+    def _render_json(self, results: List[ProcessingResult], stats: _Stats,
+                     config: Dict[str, Any], output_path: str) -> str:
+        """Render and write the JSON report from precomputed stats
         
-        # Convert dataclasses to dictionaries
-        report_data = {
+        Results are converted and encoded one at a time and streamed into the
+        "results" array, so peak memory doesn't grow with the number of entities.
+        """
+        header = {
             'metadata': {
                 'timestamp': datetime.now().isoformat(),
                 'version': '1.0',
@@ -79,27 +200,38 @@ class ReportGenerator:
             },
             'config': config,
             'summary': {
-                'total_files': len(results),
-                'total_entities': sum(len(r.entities_found) for r in results),
-                'total_questionable': sum(len(r.questionable_entities) for r in results),
-                'total_residual': sum(len(r.residual_entities) for r in results),
-                'entity_summary': self._generate_entity_summary(results),
-                'confidence_histogram': self._generate_confidence_histogram(results)
-            },
-            'results': [self._convert_dataclass_to_dict(r) for r in results]
+                'total_files': stats.total_files,
+                'total_entities': stats.total_entities,
+                'total_questionable': stats.total_questionable,
+                'total_residual': stats.total_residual,
+                'entity_summary': stats.entity_summary,
+                'confidence_histogram': stats.confidence_histogram
+            }
         }
         
-        # Write to file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(report_data, f, indent=2, ensure_ascii=False)
+        with open(output_path, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+            # Reopen the header object (drop its closing "\n}") and append "results" as
+            # its last key, laid out exactly as a single indent=2 dump would be
+            f.write(self._dumps_indented(header)[:-2])
+            if not results:
+                f.write(',\n  "results": []\n}')
+                return output_path
+            
+            f.write(',\n  "results": [')
+            separator = '\n    '
+            for result in results:
+                # Encoded JSON has no raw newlines inside strings, so re-indenting
+                # by line moves the item two levels deeper
+                item = self._dumps_indented(self._convert_dataclass_to_dict(result))
+                f.write(separator + item.replace('\n', '\n    '))
+                separator = ',\n    '
+            f.write('\n  ]\n}')
         
         return output_path
     
-    def generate_csv_findings(self, results: List[ProcessingResult], 
-                            output_path: str) -> str:
-        """Generate CSV findings report"""
-        
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+    def _render_csv(self, results: List[ProcessingResult], output_path: str) -> str:
+        """Write the CSV findings report"""
+        with open(output_path, 'w', newline='', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
             writer = csv.writer(f)
             
             # Write header
@@ -108,86 +240,179 @@ class ReportGenerator:
                 'Status', 'Start_Pos', 'End_Pos', 'Processing_Time'
             ])
             
-            # Write findings
-            for result in results:
-                for entity in result.entities_found:
-                    writer.writerow([
-                        os.path.basename(result.file_info.path),
-                        entity.entity_type,
-                        entity.value,
-                        f"{entity.confidence:.3f}",
-                        entity.detection_method,
-                        entity.status,
-                        entity.start_pos,
-                        entity.end_pos,
-                        f"{result.processing_time:.3f}"
-                    ])
+            # Write findings; per-file columns are formatted once per result and
+            # each distinct confidence is formatted once
+            formatted = _FormattedConfidences()
+            per_file = (
+                (os.path.basename(result.file_info.path), f"{result.processing_time:.3f}", result.entities_found)
+                for result in results
+            )
+            writer.writerows(
+                (filename, entity.entity_type, entity.value, formatted[entity.confidence],
+                 entity.detection_method, entity.status, entity.start_pos, entity.end_pos, processing_time)
+                for filename, processing_time, entities in per_file
+                for entity in entities
+            )
         
         return output_path
     
-    def _generate_entity_summary(self, results: List[ProcessingResult]) -> Dict[str, int]:
-        """Generate summary of entity types found"""
-        summary = {}
-        for result in results:
-            for entity in result.entities_found:
-                entity_type = entity.entity_type
-                summary[entity_type] = summary.get(entity_type, 0) + 1
-        return summary
-    
-    def _generate_confidence_histogram(self, results: List[ProcessingResult]) -> Dict[str, int]:
-        """Generate confidence score histogram"""
-        histogram = {
-            '0.0-0.2': 0, '0.2-0.4': 0, '0.4-0.6': 0, 
-            '0.6-0.8': 0, '0.8-1.0': 0
-        }
+    def _compute_stats(self, results: List[ProcessingResult]) -> _Stats:
+        """Compute totals, entity summary, confidence histogram and file summary in one pass over results"""
+        total_entities = total_questionable = total_residual = 0
+        entity_lists = []
+        add_entities = entity_lists.append
+        file_summary = []
+        append_file = file_summary.append
         
         for result in results:
-            for entity in result.entities_found:
-                conf = entity.confidence
-                if conf < 0.2:
-                    histogram['0.0-0.2'] += 1
-                elif conf < 0.4:
-                    histogram['0.2-0.4'] += 1
-                elif conf < 0.6:
-                    histogram['0.4-0.6'] += 1
-                elif conf < 0.8:
-                    histogram['0.6-0.8'] += 1
-                else:
-                    histogram['0.8-1.0'] += 1
+            entities = result.entities_found
+            questionable = len(result.questionable_entities)
+            residual = len(result.residual_entities)
+            total_entities += len(entities)
+            total_questionable += questionable
+            total_residual += residual
+            
+            add_entities(entities)
+            
+            file_info = result.file_info
+            file_size = file_info.file_size
+            processing_time = result.processing_time
+            succeeded = not result.errors
+            append_file({
+                'filename': escape(os.path.basename(file_info.path), quote=False),
+                'file_type': escape(file_info.file_type, quote=False),
+                'file_size': file_size,
+                'size_str': self._format_file_size(file_size),
+                'entities_found': len(entities),
+                'questionable_entities': questionable,
+                'residual_entities': residual,
+                'processing_time': processing_time,
+                'time_str': f"{processing_time:.3f}",
+                'status': 'Success' if succeeded else 'Error',
+                'status_class': 'status-success' if succeeded else 'status-error',
+                'errors': result.errors
+            })
         
+        # One Counter update and one list build over all entities; map() with
+        # attrgetter keeps the per-entity work in C
+        entity_summary = Counter(map(attrgetter('entity_type'), chain.from_iterable(entity_lists)))
+        confidences = list(map(attrgetter('confidence'), chain.from_iterable(entity_lists)))
+        
+        return _Stats(
+            total_files=len(results),
+            total_entities=total_entities,
+            total_questionable=total_questionable,
+            total_residual=total_residual,
+            entity_summary=dict(entity_summary),
+            confidence_histogram=dict(zip(_CONFIDENCE_LABELS, self._bucket_confidences(confidences))),
+            file_summary=file_summary
+        )
+    
+    def _bucket_confidences(self, confidences: List[float]) -> List[int]:
+        """Count confidences per histogram bin"""
+        if np is not None and confidences:
+            bins = np.searchsorted(_CONFIDENCE_BOUNDS, np.asarray(confidences, dtype=np.float64), side='right')
+            return np.bincount(bins, minlength=len(_CONFIDENCE_LABELS)).tolist()
+        
+        histogram = [0] * len(_CONFIDENCE_LABELS)
+        for conf in confidences:
+            histogram[bisect_right(_CONFIDENCE_BOUNDS, conf)] += 1
         return histogram
     
-    def _generate_file_summary(self, results: List[ProcessingResult]) -> List[Dict[str, Any]]:
-        """Generate summary for each file"""
-        file_summary = []
-        for result in results:
-            file_summary.append({
-                'filename': os.path.basename(result.file_info.path),
-                'file_type': result.file_info.file_type,
-                'file_size': result.file_info.file_size,
-                'entities_found': len(result.entities_found),
-                'questionable_entities': len(result.questionable_entities),
-                'residual_entities': len(result.residual_entities),
-                'processing_time': result.processing_time,
-                'status': 'Success' if not result.errors else 'Error',
-                'errors': result.errors
-            })
-        return file_summary
+    def _dumps_indented(self, data: Any) -> str:
+        """Serialize to 2-space indented JSON, preferring orjson over the pure-Python indent encoder"""
+        if orjson is not None:
+            try:
+                return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+            except TypeError:
+                pass  # e.g. integers beyond 64 bits; the stdlib encoder handles them
+        return json.dumps(data, indent=2, ensure_ascii=False)
     
     def _convert_dataclass_to_dict(self, obj):
-        """Convert dataclass objects to dictionaries"""
-        if is_dataclass(obj):
-            return asdict(obj)
-        elif isinstance(obj, list):
-            return [self._convert_dataclass_to_dict(item) for item in obj]
+        """Convert dataclass objects to dictionaries
+        
+        Builds the dicts by attribute access with per-type cached field names;
+        asdict() deep-copies every field and re-reads the field metadata per object.
+        """
+        if type(obj) in _SCALAR_TYPES:
+            return obj
+        convert = self._convert_dataclass_to_dict
+        if is_dataclass(obj) and not isinstance(obj, type):
+            return {name: convert(getattr(obj, name)) for name in _dataclass_field_names(type(obj))}
+        elif isinstance(obj, (list, tuple)):
+            return [convert(item) for item in obj]
         elif isinstance(obj, dict):
-            return {k: self._convert_dataclass_to_dict(v) for k, v in obj.items()}
+            return {convert(k): convert(v) for k, v in obj.items()}
         else:
             return obj
     
-    def _get_html_template(self) -> str:
-        """Get HTML template for reports"""
-        return """
+    def _format_entity_summary_html(self, summary: Dict[str, int]) -> str:
+        """Format entity summary for HTML"""
+        return "".join(f"""
+            <div class="entity-item">
+                <div class="entity-count">{count}</div>
+                <div class="entity-type">{escape(entity_type, quote=False)}</div>
+            </div>
+            """ for entity_type, count in summary.items())
+    
+    def _format_confidence_histogram_html(self, histogram: Dict[str, int]) -> str:
+        """Format confidence histogram for HTML"""
+        max_count = max(histogram.values()) if histogram.values() else 1
+        
+        parts = []
+        for range_label, count in histogram.items():
+            height_percent = (count / max_count) * 100 if max_count > 0 else 0
+            parts.append(f"""
+            <div class="histogram-bar" style="height: {height_percent}%;">
+                <div class="histogram-value">{count}</div>
+                <div class="histogram-label">{range_label}</div>
+            </div>
+            """)
+        return "".join(parts)
+    
+    def _format_file_details_html(self, file_summary: List[Dict[str, Any]]) -> str:
+        """Format file details for HTML"""
+        parts = ["""
+        <table>
+            <thead>
+                <tr>
+                    <th>Filename</th>
+                    <th>Type</th>
+                    <th>Size</th>
+                    <th>Entities</th>
+                    <th>Questionable</th>
+                    <th>Residual</th>
+                    <th>Time (s)</th>
+                    <th>Status</th>
+                </tr>
+            </thead>
+            <tbody>
+        """]
+        
+        format_row = self._ROW_TMPL.format_map
+        parts.extend(format_row(file_info) for file_info in file_summary)
+        
+        parts.append("""
+            </tbody>
+        </table>
+        """)
+        return "".join(parts)
+    
+    def _format_file_size(self, size_bytes: int) -> str:
+        """Format file size in human-readable format"""
+        if size_bytes < 1024:
+            return f"{size_bytes} B"
+        elif size_bytes < 1024 * 1024:
+            return f"{size_bytes / 1024:.1f} KB"
+        else:
+            return f"{size_bytes / (1024 * 1024):.1f} MB"
+    
+    def _format_config_json(self, config: Dict[str, Any]) -> str:
+        """Format configuration as JSON for HTML display"""
+        return escape(self._dumps_indented(config), quote=False)
+
+# HTML report template; {css_styles} and the other fields are filled with str.format
+_HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -261,10 +486,9 @@ class ReportGenerator:
 </body>
 </html>
 """
-    
-    def _get_css_styles(self) -> str:
-        """Get CSS styles for HTML reports"""
-        return """
+
+# CSS styles for HTML reports
+_CSS_STYLES = """
         * {
             margin: 0;
             padding: 0;
@@ -481,86 +705,10 @@ class ReportGenerator:
             }
         }
         """
-    
-    def _format_entity_summary_html(self, summary: Dict[str, int]) -> str:
-        """Format entity summary for HTML"""
-        html = ""
-        for entity_type, count in summary.items():
-            html += f"""
-            <div class="entity-item">
-                <div class="entity-count">{count}</div>
-                <div class="entity-type">{entity_type}</div>
-            </div>
-            """
-        return html
-    
-    def _format_confidence_histogram_html(self, histogram: Dict[str, int]) -> str:
-        """Format confidence histogram for HTML"""
-        max_count = max(histogram.values()) if histogram.values() else 1
-        
-        html = ""
-        for range_label, count in histogram.items():
-            height_percent = (count / max_count) * 100 if max_count > 0 else 0
-            html += f"""
-            <div class="histogram-bar" style="height: {height_percent}%;">
-                <div class="histogram-value">{count}</div>
-                <div class="histogram-label">{range_label}</div>
-            </div>
-            """
-        return html
-    
-    def _format_file_details_html(self, file_summary: List[Dict[str, Any]]) -> str:
-        """Format file details for HTML"""
-        html = """
-        <table>
-            <thead>
-                <tr>
-                    <th>Filename</th>
-                    <th>Type</th>
-                    <th>Size</th>
-                    <th>Entities</th>
-                    <th>Questionable</th>
-                    <th>Residual</th>
-                    <th>Time (s)</th>
-                    <th>Status</th>
-                </tr>
-            </thead>
-            <tbody>
-        """
-        
-        for file_info in file_summary:
-            status_class = "status-success" if file_info['status'] == 'Success' else "status-error"
-            html += f"""
-            <tr>
-                <td>{file_info['filename']}</td>
-                <td>{file_info['file_type']}</td>
-                <td>{self._format_file_size(file_info['file_size'])}</td>
-                <td>{file_info['entities_found']}</td>
-                <td>{file_info['questionable_entities']}</td>
-                <td>{file_info['residual_entities']}</td>
-                <td>{file_info['processing_time']:.3f}</td>
-                <td class="{status_class}">{file_info['status']}</td>
-            </tr>
-            """
-        
-        html += """
-            </tbody>
-        </table>
-        """
-        return html
-    
-    def _format_file_size(self, size_bytes: int) -> str:
-        """Format file size in human-readable format"""
-        if size_bytes < 1024:
-            return f"{size_bytes} B"
-        elif size_bytes < 1024 * 1024:
-            return f"{size_bytes / 1024:.1f} KB"
-        else:
-            return f"{size_bytes / (1024 * 1024):.1f} MB"
-    
-    def _format_config_json(self, config: Dict[str, Any]) -> str:
-        """Format configuration as JSON for HTML display"""
-        return json.dumps(config, indent=2, ensure_ascii=False)
+
+# Template with the CSS already substituted (braces escaped for the final format call)
+_HTML_SKELETON = _HTML_TEMPLATE.replace(
+    '{css_styles}', _CSS_STYLES.replace('{', '{{').replace('}', '}}'))
 
 # Test the report generator
 if __name__ == "__main__":
@@ -4,212 +4,465 @@ LongTransformer PII Model Loader
 Handles the LongTransformer PII detection model with .ckpt checkpoint format
 """
 
+import gc
 import torch
 import os
 import re
+import threading
 from transformers import AutoTokenizer, AutoModelForTokenClassification
+from functools import lru_cache
 from typing import Dict, List, Tuple
 
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# Other modules named re2 (e.g. a stray re2/ directory) can import without a compile()
+if re2 is not None and not hasattr(re2, 'compile'):
+    re2 = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+MAX_LENGTH = 2048  # LongTransformer can handle longer sequences
+# Padded sequence lengths used for batched inference; each text runs in the
+# smallest bucket that holds its tokens, so short texts never pay for 2048
+BUCKET_SIZES = (128, 256, 512, 1024, MAX_LENGTH)
+
+# RE2 matches in guaranteed linear time on large inputs when it is installed
+_SSN_RE = (re2 or re).compile(r'\b(\d{3}-\d{2}-\d{4}|\d{9})\b')
+
+# Cheap signs of possible PII (digits, '@', or a run of two capitalised
+# words); longer texts with none of them never reach the model
+_PII_TRIGGER_RE = re.compile(r'[\d@]|\b[A-Z][a-z]+\s+[A-Z][a-z]+')
+# Below this many characters the model pass is cheap enough to always run
+PREFILTER_MIN_CHARS = 64
+# Entity count from which masking switches to an Aho-Corasick automaton
+AHOCORASICK_MIN_VALUES = 32
+
+def _bucket_size(length: int) -> int:
+    """Smallest bucket that holds a sequence of the given token length"""
+    return next(size for size in BUCKET_SIZES if size >= length)
+
+def _load_model_from_checkpoint(model_path: str):
+    """Load model from .ckpt checkpoint file"""
+    checkpoint_path = os.path.join(model_path, "ckeckpoint_0.ckpt")
+    
+    if not os.path.exists(checkpoint_path):
+        raise FileNotFoundError(f"Checkpoint file not found: {checkpoint_path}")
+    
+    # Load checkpoint, memory-mapped where the torch version and file format allow
+    try:
+        checkpoint = torch.load(checkpoint_path, map_location='cpu', mmap=True)
+    except (TypeError, RuntimeError):
+        checkpoint = torch.load(checkpoint_path, map_location='cpu')
+    
+    # Extract model state dict
+    if 'state_dict' in checkpoint:
+        state_dict = checkpoint['state_dict']
+    elif 'model' in checkpoint:
+        state_dict = checkpoint['model']
+    else:
+        state_dict = checkpoint
+    
+    # Create model architecture (assuming it's a token classification model)
+    # We'll use a base model and load the weights
+    try:
+        # Try to load config from the checkpoint
+        if 'config' in checkpoint:
+            config = checkpoint['config']
+            model = AutoModelForTokenClassification.from_config(config)
+        else:
+            # Fallback: create a basic model and load weights
+            model = AutoModelForTokenClassification.from_pretrained(
+                'microsoft/deberta-v3-base',
+                num_labels=13  # Based on the original model labels
+            )
+    except Exception as e:
+        print(f"Warning: Could not load model config, using fallback: {e}")
+        model = AutoModelForTokenClassification.from_pretrained(
+            'microsoft/deberta-v3-base',
+            num_labels=13
+        )
+    
+    # Load state dict; non-strict loading reports mismatches instead of raising
+    incompatible = model.load_state_dict(state_dict, strict=False)
+    if incompatible.missing_keys:
+        print(f"Warning: {len(incompatible.missing_keys)} model weights missing from checkpoint")
+    else:
+        print("✅ Model weights loaded successfully!")
+    
+    # The weights now live in the model; release the checkpoint copy before
+    # the model is moved to the device
+    del state_dict, checkpoint
+    gc.collect()
+    
+    return model
+
+@lru_cache(maxsize=2)
+def _load_cached(model_path: str, device: str):
+    """Load the tokenizer and model once per checkpoint and device"""
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = _load_model_from_checkpoint(model_path)
+    # BF16 weights run on the tensor cores of Ampere and newer GPUs
+    if device == 'cuda' and torch.cuda.is_bf16_supported():
+        model.to(torch.bfloat16)
+    model.to(device)
+    model.eval()
+    return tokenizer, model
+
+class _CudaGraphSet:
+    """Batch-of-one CUDA graphs for one model, captured per bucket on first use
+    
+    Replaying a graph skips the CPU launch of each of the forward's kernels,
+    which dominates latency for a single text. Every graph allocates from one
+    shared memory pool, which is safe because replays never overlap: callers
+    hold the lock from copy-in until the logits are read back.
+    """
+    
+    def __init__(self, model, pad_id: int):
+        self.model = model
+        self.pad_id = pad_id
+        self.lock = threading.Lock()
+        self.failed = False
+        self._graphs = {}
+        self._pool = None
+    
+    def get(self, bucket: int):
+        """Return (graph, input_ids, attention_mask, logits) for a bucket; call with the lock held"""
+        captured = self._graphs.get(bucket)
+        if captured is None and not self.failed:
+            try:
+                captured = self._capture(bucket)
+            except Exception as e:
+                print(f"Warning: CUDA graph capture failed, using eager forward: {e}")
+                self.failed = True
+                return None
+            self._graphs[bucket] = captured
+        return captured
+    
+    def _capture(self, bucket: int):
+        """Capture the forward for one bucket into the shared pool"""
+        input_ids = torch.full((1, bucket), self.pad_id, dtype=torch.long, device='cuda')
+        attention_mask = torch.ones_like(input_ids)
+        
+        # Warm up on a side stream so capture sees initialized kernels
+        stream = torch.cuda.Stream()
+        stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(stream), torch.no_grad():
+            for _ in range(3):
+                self.model(input_ids=input_ids, attention_mask=attention_mask)
+        torch.cuda.current_stream().wait_stream(stream)
+        
+        graph = torch.cuda.CUDAGraph()
+        with torch.no_grad(), torch.cuda.graph(graph, pool=self._pool):
+            logits = self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+        if self._pool is None:
+            self._pool = graph.pool()
+        return graph, input_ids, attention_mask, logits
+
+@lru_cache(maxsize=2)
+def _cached_cuda_graphs(model_path: str, device: str) -> _CudaGraphSet:
+    """CUDA graphs for the cached model, shared by every masker like the model itself"""
+    tokenizer, model = _load_cached(model_path, device)
+    return _CudaGraphSet(model, tokenizer.pad_token_id or 0)
+
 class LongTransformerPIIMasker:
     """LongTransformer-based PII detection model"""
     
+    # Upper bound on texts per forward pass, keeps memory bounded in big buckets
+    BATCH_SIZE = 16
+    
     def __init__(self):
         current_dir = os.path.dirname(os.path.abspath(__file__))
         model_path = os.path.join(current_dir, "output_model", "longtransformer_pii")
+        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
         
-        # Load tokenizer
-        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        # Tokenizer and checkpoint are shared by every masker on this device
+        self.tokenizer, self.model = _load_cached(model_path, self.device)
         
-        # Load model from checkpoint
-        self.model = self._load_model_from_checkpoint(model_path)
+        # Label metadata, read once instead of walking the HF config per call
+        config = self.model.config
+        self._id2label = dict(config.id2label)
+        self._num_labels = config.num_labels
+        self._labels = list(self._id2label.values())
         
-        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        self.model.to(self.device)
+        # Label names indexed by class id, for direct lookup of argmax results
+        self._label_names = tuple(self._id2label.get(i, 'O') for i in range(self._num_labels))
         
-        print(f"✅ LongTransformer PII model loaded successfully on {self.device}!")
-    
-    def _load_model_from_checkpoint(self, model_path: str):
-        """Load model from .ckpt checkpoint file"""
-        checkpoint_path = os.path.join(model_path, "ckeckpoint_0.ckpt")
+        # Ids of <s>, </s>, <pad> and friends, dropped before any string work
+        self._special_ids = torch.tensor(sorted(self.tokenizer.all_special_ids), dtype=torch.long)
         
-        if not os.path.exists(checkpoint_path):
-            raise FileNotFoundError(f"Checkpoint file not found: {checkpoint_path}")
+        # Opt-in INT8 weights for the Linear layers, served by INT8 GEMM kernels on CPU
+        if self.device == 'cpu' and os.getenv('PIICLOAK_INT8') == '1':
+            self.model = torch.ao.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
         
-        # Load checkpoint
-        checkpoint = torch.load(checkpoint_path, map_location='cpu')
+        # Opt-in BF16 autocast on CPU, worthwhile on CPUs with AMX/AVX-512 BF16
+        self._cpu_bf16 = (self.device == 'cpu' and os.getenv('PIICLOAK_BF16') == '1'
+                          and os.getenv('PIICLOAK_INT8') != '1')
         
-        # Extract model state dict
-        if 'state_dict' in checkpoint:
-            state_dict = checkpoint['state_dict']
-        elif 'model' in checkpoint:
-            state_dict = checkpoint['model']
-        else:
-            state_dict = checkpoint
-        
-        # Create model architecture (assuming it's a token classification model)
-        # We'll use a base model and load the weights
-        try:
-            # Try to load config from the checkpoint
-            if 'config' in checkpoint:
-                config = checkpoint['config']
-                model = AutoModelForTokenClassification.from_config(config)
-            else:
-                # Fallback: create a basic model and load weights
-                model = AutoModelForTokenClassification.from_pretrained(
-                    'microsoft/deberta-v3-base',
-                    num_labels=13  # Based on the original model labels
-                )
-        except Exception as e:
-            print(f"Warning: Could not load model config, using fallback: {e}")
-            model = AutoModelForTokenClassification.from_pretrained(
-                'microsoft/deberta-v3-base',
-                num_labels=13
-            )
+        # Page-locked staging buffers for host-to-GPU copies, one per input
+        # name and kept per thread so concurrent callers never share one
+        self._pinned = threading.local()
+        
+        # Opt-in torch.compile; its reduce-overhead mode does its own graph capture
+        self._compiled = os.getenv('PIICLOAK_COMPILE') == '1'
+        if self._compiled:
+            self.model = torch.compile(self.model, mode='reduce-overhead')
+            self._warm_up_compiled()
         
-        # Load state dict
-        try:
-            model.load_state_dict(state_dict, strict=False)
-            print("✅ Model weights loaded successfully!")
-        except Exception as e:
-            print(f"Warning: Could not load all weights: {e}")
-            # Try partial loading
-            model.load_state_dict(state_dict, strict=False)
+        # Single-text forwards on GPU replay a graph per bucket, captured on first use
+        if self.device == 'cuda' and not self._compiled:
+            self._cuda_graphs = _cached_cuda_graphs(model_path, self.device)
+        else:
+            self._cuda_graphs = None
         
-        return model
+        print(f"✅ LongTransformer PII model loaded successfully on {self.device}!")
+    
+    def _warm_up_compiled(self):
+        """Compile the forward for each bucket shape before the first real call"""
+        with torch.no_grad():
+            for bucket in BUCKET_SIZES:
+                inputs = self.tokenizer("", padding='max_length', max_length=bucket, return_tensors="pt")
+                self.model(**self._to_device(inputs))
+    
+    def _stage(self, key: str, value):
+        """Copy a CPU tensor into this thread's pinned buffer for the input name"""
+        buffers = getattr(self._pinned, 'buffers', None)
+        if buffers is None:
+            buffers = self._pinned.buffers = {}
+        buffer = buffers.get(key)
+        if buffer is None or buffer.dtype != value.dtype:
+            # Sized for the largest group the bucketing can produce
+            buffer = torch.empty(self.BATCH_SIZE * MAX_LENGTH, dtype=value.dtype, pin_memory=True)
+            buffers[key] = buffer
+        staged = buffer[:value.numel()].view(value.shape)
+        staged.copy_(value)
+        return staged
+    
+    def _to_device(self, inputs):
+        """Move tokenizer output to the device, asynchronously from pinned memory on GPU"""
+        if self.device != 'cuda':
+            return {k: v.to(self.device) for k, v in inputs.items()}
+        return {k: self._stage(k, v).to(self.device, non_blocking=True) for k, v in inputs.items()}
+    
+    def _run_cuda_graph(self, bucket: int, inputs):
+        """Replay the bucket's graph on inputs padded to its size, or return None if it can't be captured"""
+        graphs = self._cuda_graphs
+        # Hold the graph from copy-in until its logits are read back,
+        # so concurrent callers cannot overwrite each other's tensors
+        with graphs.lock:
+            captured = graphs.get(bucket)
+            if captured is None:
+                return None
+            graph, input_ids, attention_mask, logits = captured
+            input_ids.copy_(self._stage('input_ids', inputs['input_ids']), non_blocking=True)
+            attention_mask.copy_(self._stage('attention_mask', inputs['attention_mask']), non_blocking=True)
+            graph.replay()
+            return self._to_host({'input_ids': input_ids, 'attention_mask': attention_mask}, logits)
     
     def mask_pii(self, input_text: str) -> Tuple[str, Dict[str, List[str]]]:
         """Detect and mask PII in input text"""
-        # Tokenize input
-        inputs = self.tokenizer(
-            input_text, 
-            return_tensors="pt", 
-            padding=True, 
-            truncation=True,
-            max_length=2048  # LongTransformer can handle longer sequences
-        )
-        
-        # Move inputs to device
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
-        
-        # Get predictions
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-        
-        logits = outputs.logits
-        predictions = torch.argmax(logits, dim=2)
-        
-        # Get predicted labels
-        predicted_labels = []
-        for pred in predictions[0]:
-            if pred.item() < len(self.model.config.id2label):
-                label = self.model.config.id2label[pred.item()]
-                predicted_labels.append(label)
+        return self.mask_pii_batch([input_text])[0]
+    
+    def mask_pii_batch(self, texts: List[str]) -> List[Tuple[str, Dict[str, List[str]]]]:
+        """Detect and mask PII in several texts, returned in input order"""
+        results = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if len(text) > PREFILTER_MIN_CHARS and not _PII_TRIGGER_RE.search(text):
+                # Nothing that looks like PII, so skip the model pass entirely
+                results[i] = self._finish(text, {})
             else:
-                predicted_labels.append('O')
+                pending.append(i)
         
-        # Process results - reconstruct entities from consecutive tokens
-        tokens = self.tokenizer.convert_ids_to_tokens(inputs['input_ids'][0])
-        result_dict = {}
+        if pending:
+            model_results = self._predict_batch([texts[i] for i in pending])
+            for i, result in zip(pending, model_results):
+                results[i] = result
+        
+        return results
+    
+    def _predict_batch(self, texts: List[str]) -> List[Tuple[str, Dict[str, List[str]]]]:
+        """Run the model over texts, returned in input order
         
-        current_entity = None
-        current_tokens = []
+        Texts are sorted by token length and grouped into power-of-two
+        buckets, with one forward pass per group instead of one per text.
+        """
+        # Tokenize once without padding to learn each text's real length
+        encodings = self.tokenizer(list(texts), truncation=True, max_length=MAX_LENGTH)
+        lengths = [len(ids) for ids in encodings['input_ids']]
+        order = sorted(range(len(texts)), key=lengths.__getitem__)
         
-        for token, label in zip(tokens, predicted_labels):
-            # Clean up token
-            clean_token = token.replace('▁', ' ').replace('<s>', '').replace('</s>', '').strip()
+        results = [None] * len(texts)
+        for indices in self._bucket_indices(order, lengths):
+            bucket = _bucket_size(lengths[indices[-1]])
+            use_graph = len(indices) == 1 and self._cuda_graphs is not None and not self._cuda_graphs.failed
             
-            # Skip special tokens
-            if clean_token in ['<s>', '</s>', '<pad>'] or not clean_token:
-                continue
+            # Pad to the longest member of the group (bounded by its bucket),
+            # or to the full bucket for fixed-shape graphs and compiled models
+            pad_to_bucket = use_graph or self._compiled
+            inputs = self.tokenizer.pad(
+                [{key: encodings[key][i] for key in encodings} for i in indices],
+                padding='max_length' if pad_to_bucket else 'longest',
+                max_length=bucket if pad_to_bucket else None,
+                return_tensors="pt"
+            )
             
-            if label != 'O':
-                # Start or continue entity
-                if current_entity is None:
-                    current_entity = label
-                    current_tokens = [clean_token]
-                elif current_entity == label:
-                    # Continue current entity
-                    current_tokens.append(clean_token)
-                else:
-                    # Different entity type - save current and start new
-                    if current_tokens:
-                        entity_text = ' '.join(current_tokens).strip()
-                        if entity_text:
-                            if current_entity not in result_dict:
-                                result_dict[current_entity] = []
-                            result_dict[current_entity].append(entity_text)
-                    
-                    current_entity = label
-                    current_tokens = [clean_token]
-            else:
-                # End of entity
-                if current_entity and current_tokens:
-                    entity_text = ' '.join(current_tokens).strip()
-                    if entity_text:
-                        if current_entity not in result_dict:
-                            result_dict[current_entity] = []
-                        result_dict[current_entity].append(entity_text)
+            host = self._run_cuda_graph(bucket, inputs) if use_graph else None
+            if host is None:
+                # Move inputs to device
+                inputs = self._to_device(inputs)
                 
-                current_entity = None
-                current_tokens = []
-        
-        # Handle any remaining entity
-        if current_entity and current_tokens:
-            entity_text = ' '.join(current_tokens).strip()
-            if entity_text:
-                if current_entity not in result_dict:
-                    result_dict[current_entity] = []
-                result_dict[current_entity].append(entity_text)
+                # Get predictions
+                with torch.no_grad(), torch.autocast('cpu', dtype=torch.bfloat16, enabled=self._cpu_bf16):
+                    logits = self.model(**inputs).logits
+                host = self._to_host(inputs, logits)
+            predictions, input_ids, keep_mask = host
+            
+            for row, i in enumerate(indices):
+                keep = keep_mask[row]
+                result_dict = self._extract_entities(
+                    input_ids[row][keep], predictions[row][keep]
+                )
+                results[i] = self._finish(texts[i], result_dict)
         
+        return results
+    
+    def _to_host(self, inputs, logits):
+        """Bring a group's predictions, token ids and keep mask back to the CPU"""
+        # One device-to-host transfer per group instead of one per token
+        predictions = torch.argmax(logits, dim=2).cpu()
+        input_ids = inputs['input_ids'].cpu()
+        # Keep real tokens only: no padding and no special tokens
+        keep_mask = inputs['attention_mask'].cpu().bool() & ~torch.isin(input_ids, self._special_ids)
+        return predictions, input_ids, keep_mask
+    
+    def _finish(self, text: str, result_dict: Dict[str, List[str]]) -> Tuple[str, Dict[str, List[str]]]:
+        """Add regex SSN matches to the model's entities and mask the text"""
         # Extract SSNs using regex (fallback)
-        ssn_dict = self.extract_ssn(input_text)
-        result_dict.update(ssn_dict)
+        for entity_type, values in self.extract_ssn(text).items():
+            if entity_type not in result_dict:
+                result_dict[entity_type] = []
+            result_dict[entity_type].extend(values)
         
         # Create masked text
-        masked_text = self._create_masked_text(input_text, result_dict)
+        return self._create_masked_text(text, result_dict), result_dict
+    
+    def _bucket_indices(self, order: List[int], lengths: List[int]):
+        """Yield groups of text indices that share a length bucket"""
+        group = []
+        group_bucket = None
+        for i in order:
+            bucket = _bucket_size(lengths[i])
+            if group and (bucket != group_bucket or len(group) >= self.BATCH_SIZE):
+                yield group
+                group = []
+            group.append(i)
+            group_bucket = bucket
+        if group:
+            yield group
+    
+    def _extract_entities(self, input_ids, predictions) -> Dict[str, List[str]]:
+        """Reconstruct entities from runs of identical labels in a single sequence"""
+        label_ids = predictions
+        if not len(label_ids):
+            return {}
+        
+        # Run-length encode the labels: a run starts wherever the label changes
+        starts = torch.ones(len(label_ids), dtype=torch.bool)
+        starts[1:] = label_ids[1:] != label_ids[:-1]
+        bounds = starts.nonzero().flatten().tolist() + [len(label_ids)]
+        
+        labels = label_ids.tolist()
+        token_ids = input_ids.tolist()
+        result_dict = {}
+        
+        for start, end in zip(bounds, bounds[1:]):
+            # argmax over num_labels logits, so every id has a name
+            label = self._label_names[labels[start]]
+            if label == 'O':
+                continue
+            
+            # Let the tokenizer merge subword pieces back into text
+            tokens = self.tokenizer.convert_ids_to_tokens(token_ids[start:end])
+            entity_text = self.tokenizer.convert_tokens_to_string(tokens).strip()
+            if entity_text:
+                if label not in result_dict:
+                    result_dict[label] = []
+                result_dict[label].append(entity_text)
         
-        return masked_text, result_dict
+        return result_dict
     
     def _create_masked_text(self, text: str, pii_dict: Dict[str, List[str]]) -> str:
         """Create masked version of the text"""
-        masked_text = text
-        
-        # Sort entities by length (longest first) to avoid partial matches
-        all_entities = []
+        # Map each value to its entity type (the first type listed wins)
+        value_types = {}
         for entity_type, values in pii_dict.items():
             for value in values:
                 # Skip empty or invalid values
-                if value and value.strip() and len(value.strip()) > 0:
-                    all_entities.append((value.strip(), entity_type))
+                value = value.strip() if value else ''
+                if value and value not in value_types:
+                    value_types[value] = f"[{entity_type.upper()}]"
         
-        all_entities.sort(key=lambda x: len(x[0]), reverse=True)
+        if not value_types:
+            return text
         
-        # Replace entities with masks
-        for value, entity_type in all_entities:
-            if value in masked_text:
-                mask = f"[{entity_type.upper()}]"
-                masked_text = masked_text.replace(value, mask)
+        if ahocorasick is not None and len(value_types) >= AHOCORASICK_MIN_VALUES:
+            return self._mask_with_automaton(text, value_types)
         
-        return masked_text
+        # One alternation tried longest first, so partial matches lose,
+        # replaces every entity in a single pass over the text
+        pattern = re.compile('|'.join(
+            re.escape(value) for value in sorted(value_types, key=len, reverse=True)
+        ))
+        return pattern.sub(lambda match: value_types[match.group(0)], text)
+    
+    @staticmethod
+    def _mask_with_automaton(text: str, value_types: Dict[str, str]) -> str:
+        """Mask many entities in one linear scan with an Aho-Corasick automaton"""
+        automaton = ahocorasick.Automaton()
+        for value, mask in value_types.items():
+            automaton.add_word(value, (len(value), mask))
+        automaton.make_automaton()
+        
+        # Keep the longest match at each leftmost free position, the same
+        # choice the longest-first regex alternation makes
+        matches = sorted(
+            (end - length + 1, -length, mask) for end, (length, mask) in automaton.iter(text)
+        )
+        parts = []
+        pos = 0
+        for start, neg_length, mask in matches:
+            if start < pos:
+                continue
+            parts.append(text[pos:start])
+            parts.append(mask)
+            pos = start - neg_length
+        parts.append(text[pos:])
+        return "".join(parts)
     
     @staticmethod
     def extract_ssn(input_string: str) -> Dict[str, List[str]]:
-        """Extract SSNs using regex pattern"""
-        ssn_pattern = r'\b(\d{3}-\d{2}-\d{4}|\d{9})\b'
-        ssn_dict = {}
-        matches = re.findall(ssn_pattern, input_string)
-        for ssn in matches:
-            ssn_dict[ssn] = ['SSN']
-        return ssn_dict
+        """Extract SSNs using regex pattern, keyed by entity type like the model output"""
+        matches = _SSN_RE.findall(input_string)
+        if not matches:
+            return {}
+        return {'SSN': list(dict.fromkeys(matches))}
     
     def get_model_info(self) -> Dict[str, any]:
         """Get information about the loaded model"""
         return {
             'model_type': 'LongTransformer',
             'device': self.device,
-            'num_labels': self.model.config.num_labels if hasattr(self.model.config, 'num_labels') else 'Unknown',
-            'max_length': 2048,
-            'labels': list(self.model.config.id2label.values()) if hasattr(self.model.config, 'id2label') else []
+            'num_labels': self._num_labels,
+            'max_length': MAX_LENGTH,
+            'labels': list(self._labels)
         }
 
 # Test the model
@@ -4,29 +4,125 @@ Script to extract text content from .docx files
 """
 
 import sys
+import zipfile
 from docx import Document
+from lxml import etree
 import os
 
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W_P = f'{{{W_NS}}}p'
+W_TBL = f'{{{W_NS}}}tbl'
+W_TR = f'{{{W_NS}}}tr'
+W_TC = f'{{{W_NS}}}tc'
+W_R = f'{{{W_NS}}}r'
+W_HYPERLINK = f'{{{W_NS}}}hyperlink'
+W_T = f'{{{W_NS}}}t'
+W_BR = f'{{{W_NS}}}br'
+W_BR_TYPE = f'{{{W_NS}}}type'
+
+# Text equivalents of run content, matching python-docx's Run.text
+_RUN_CHARS = {
+    f'{{{W_NS}}}tab': "\t",
+    f'{{{W_NS}}}ptab': "\t",
+    f'{{{W_NS}}}cr': "\n",
+    f'{{{W_NS}}}noBreakHyphen': "-",
+}
+
+def _run_text(r):
+    """Text of a run element, with tabs, breaks and hyphens translated"""
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == W_T:
+            parts.append(child.text or "")
+        elif tag == W_BR:
+            # Page and column breaks carry no text
+            if child.get(W_BR_TYPE, 'textWrapping') == 'textWrapping':
+                parts.append("\n")
+        elif tag in _RUN_CHARS:
+            parts.append(_RUN_CHARS[tag])
+    return "".join(parts)
+
+def _paragraph_text(p):
+    """Text of a paragraph element's runs, including those in hyperlinks"""
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            parts.append(_run_text(child))
+        elif child.tag == W_HYPERLINK:
+            parts.extend(_run_text(r) for r in child.iterchildren(W_R))
+    return "".join(parts)
+
+def _table_rows(tbl):
+    """Yield the ' | '-joined text of each row in a table element
+    
+    Each cell's text is its paragraphs joined by newlines, as python-docx's
+    cell.text, but walked with lxml child iteration in C.
+    """
+    for tr in tbl.iterchildren(W_TR):
+        row_text = []
+        for tc in tr.iterchildren(W_TC):
+            cell_text = "\n".join(_paragraph_text(p) for p in tc.iterchildren(W_P)).strip()
+            if cell_text:
+                row_text.append(cell_text)
+        if row_text:
+            yield " | ".join(row_text)
+
+def _block_text(elem):
+    """Yield the text lines of a body-level paragraph or table element"""
+    if elem.tag == W_P:
+        text = _paragraph_text(elem)
+        if text.strip():
+            yield text
+    elif elem.tag == W_TBL:
+        yield from _table_rows(elem)
+
+def _release(elem):
+    """Free a processed top-level element and the siblings already read before it"""
+    elem.clear()
+    parent = elem.getparent()
+    while elem.getprevious() is not None:
+        del parent[0]
+
+def iter_docx_text(file_path):
+    """Yield paragraph and table row text from a .docx file in document order
+    
+    Streams word/document.xml with iterparse in a single pass and clears
+    each element once it has been read, so the whole XML tree is never held.
+    """
+    with zipfile.ZipFile(file_path) as z, z.open('word/document.xml') as f:
+        table_depth = 0
+        for event, elem in etree.iterparse(f, events=('start', 'end'), tag=(W_P, W_TBL)):
+            if elem.tag == W_TBL:
+                if event == 'start':
+                    table_depth += 1
+                    continue
+                table_depth -= 1
+                if table_depth == 0:
+                    yield from _block_text(elem)
+                    _release(elem)
+            elif event == 'end' and table_depth == 0:
+                # Cell paragraphs are left in place for their table's rows
+                yield from _block_text(elem)
+                _release(elem)
+
 def read_docx(file_path):
     """Extract text from a .docx file"""
+    try:
+        return "\n".join(iter_docx_text(file_path))
+    except (KeyError, OSError, zipfile.BadZipFile, etree.XMLSyntaxError):
+        # Unusual packaging or unreadable file; python-docx resolves the main
+        # document part itself and reports the error below
+        pass
+    
     try:
         doc = Document(file_path)
         full_text = []
         
-        # Extract text from paragraphs
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                full_text.append(paragraph.text)
-        
-        # Extract text from tables
-        for table in doc.tables:
-            for row in table.rows:
-                row_text = []
-                for cell in row.cells:
-                    if cell.text.strip():
-                        row_text.append(cell.text.strip())
-                if row_text:
-                    full_text.append(" | ".join(row_text))
+        # Walk the body once in document order, reading paragraphs and tables
+        # straight from their XML rather than through python-docx proxies
+        for child in doc.element.body.iterchildren():
+            full_text.extend(_block_text(child))
         
         return "\n".join(full_text)
     
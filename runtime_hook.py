@@ -1,10 +1,16 @@
 # Runtime hook to handle pathlib issue
+# The PyPI "pathlib" backport shadows the standard library module and breaks
+# the frozen app, so drop it if it was imported before the app starts
 import sys
-import os
 
-# Try to remove pathlib from sys.modules if it exists
-if 'pathlib' in sys.modules:
-    del sys.modules['pathlib']
+def _is_backport(module):
+    """Whether a loaded pathlib is the PyPI backport rather than the stdlib module"""
+    origin = (getattr(module, '__file__', None) or '').replace('\\', '/').lower()
+    if '/site-packages/' in origin or '/dist-packages/' in origin:
+        return True
+    # In the bundle every module loads from the archive under sys._MEIPASS, so
+    # tell them apart by API: stdlib paths support os.fspath(), the backport predates it
+    return not hasattr(getattr(module, 'PurePath', None), '__fspath__')
 
-# Also try to remove from sys.path
-sys.path = [p for p in sys.path if 'pathlib' not in p]
+if 'pathlib' in sys.modules and _is_backport(sys.modules['pathlib']):
+    sys.modules.pop('pathlib', None)
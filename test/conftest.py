@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Shared pytest fixtures for the Epic B tests
+Builds the detection engine (and any ML models it loads) once per session
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add core directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+@pytest.fixture(scope="session")
+def detection_engine():
+    """One PIIDetectionEngine shared by every test in the session"""
+    from detection_engine import PIIDetectionEngine
+    return PIIDetectionEngine()
+
+@pytest.fixture(scope="session")
+def processor(detection_engine):
+    """FileProcessor over the shared engine"""
+    from file_processor import FileProcessor
+    return FileProcessor(detection_engine)
+
+@pytest.fixture(scope="session")
+def modifier(detection_engine):
+    """DocumentModifier over the shared engine"""
+    from document_modifier import DocumentModifier
+    return DocumentModifier(detection_engine)
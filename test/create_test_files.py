@@ -7,6 +7,7 @@ Generates comprehensive test files for all supported file types
 import os
 import csv
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -334,27 +335,22 @@ def create_log_test_file():
     
     print(f"✅ Created LOG test file: {log_file}")
 
-def create_large_csv_test_file():
+def create_large_csv_test_file(num_rows=1000):
     """Create a large CSV test file for streaming testing"""
     large_csv_file = Path("test/large_test_data.csv")
     
-    # Create a large CSV file with many rows
-    with open(large_csv_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        
-        # Write header
-        writer.writerow(["ID", "Name", "Email", "Phone", "SSN", "Address"])
-        
-        # Write many rows
-        for i in range(1000):  # 1000 rows for testing
-            writer.writerow([
-                f"ID{i:04d}",
-                f"User{i}",
-                f"user{i}@test{i}.com",
-                f"(555) {i:03d}-{i:04d}",
-                f"{i:03d}-{i:02d}-{i:04d}",
-                f"{i} Test Street, City{i}, ST {i:05d}"
-            ])
+    # Format every row up front and write them in one call; the rows are
+    # fixed-shape, so the address (the only field with commas) is quoted by
+    # hand and lines end in "\r\n" exactly as csv.writer would produce
+    rows = "".join(
+        f'ID{i:04d},User{i},user{i}@test{i}.com,(555) {i:03d}-{i:04d},'
+        f'{i:03d}-{i:02d}-{i:04d},"{i} Test Street, City{i}, ST {i:05d}"\r\n'
+        for i in range(num_rows)
+    )
+    
+    with open(large_csv_file, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+        f.write("ID,Name,Email,Phone,SSN,Address\r\n")
+        f.write(rows)
     
     print(f"✅ Created large CSV test file: {large_csv_file}")
 
@@ -367,16 +363,22 @@ def main():
     test_dir = Path("test")
     test_dir.mkdir(exist_ok=True)
     
-    # Create test files
-    create_csv_test_file()
-    create_txt_test_file()
-    create_docx_test_file()
-    create_pptx_test_file()
-    create_xlsx_test_file()
-    create_pdf_test_file()
-    create_md_test_file()
-    create_log_test_file()
-    create_large_csv_test_file()
+    # Create test files; each writes its own file, so they run in parallel
+    creators = [
+        create_csv_test_file,
+        create_txt_test_file,
+        create_docx_test_file,
+        create_pptx_test_file,
+        create_xlsx_test_file,
+        create_pdf_test_file,
+        create_md_test_file,
+        create_log_test_file,
+        create_large_csv_test_file,
+    ]
+    with ProcessPoolExecutor() as executor:
+        futures = [executor.submit(creator) for creator in creators]
+        for future in futures:
+            future.result()  # Re-raise any failure from the worker
     
     print("\n" + "=" * 60)
     print("✅ All test files created successfully!")
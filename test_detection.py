@@ -110,6 +110,28 @@ def test_validation():
         is_valid = engine._validate_ssn(ssn)
         print(f"  {ssn}: {'✅ Valid' if is_valid else '❌ Invalid'}")
 
+def test_prefilter():
+    """Test that the pre-filter never skips text the detector would mask"""
+    print("\n⏩ Testing Detection Pre-filter")
+    print("=" * 50)
+    
+    engine = PIIDetectionEngine()
+    
+    samples = ["", " ", "-", "42", "3.14", "N/A", "123-45-6789", "10.0.0.1",
+               "(555) 123-4567", "john.smith@email.com", "https://example.com",
+               "12345", "Total", "Name: John Smith"]
+    
+    for text in samples:
+        scanned = engine.may_contain_pii(text)
+        result = engine.detect_pii(text)
+        print(f"  {text!r}: {'scan' if scanned else 'skip'}")
+        if not scanned:
+            assert not result.entities_found, f"Pre-filter skipped PII in {text!r}"
+    
+    batch = engine.detect_pii_batch(samples)
+    assert [r.masked_content for r in batch] == [engine.detect_pii(t).masked_content for t in samples]
+
 if __name__ == "__main__":
     test_detection_engine()
     test_validation()
+    test_prefilter()
@@ -315,5 +315,77 @@ Bob Johnson,bob.j@business.net,(555) 456-7890,789 Pine Rd"""
     
     print("\n✅ File processor test completed!")
 
+def test_process_files():
+    """Test that bulk processing matches processing each file on its own"""
+    
+    print("🧪 Testing Bulk File Processing")
+    print("=" * 50)
+    
+    engine = PIIDetectionEngine()
+    processor = FileProcessor(engine)
+    
+    file_paths = ['test_bulk_1.txt', 'test_bulk_2.txt', 'test_bulk_3.csv']
+    contents = [
+        "Contact John Smith at john.smith@email.com",
+        "No personal data in this file",
+        "Name,SSN\nJane Doe,123-45-6789"
+    ]
+    
+    try:
+        for path, content in zip(file_paths, contents):
+            with open(path, 'w', newline='') as f:
+                f.write(content)
+        
+        single_results = [processor.process_file(path) for path in file_paths]
+        
+        for mode, bulk_results in [
+            ("read-ahead", processor.process_files(file_paths, readahead=2)),
+            ("parallel", processor.process_files_parallel(file_paths, workers=2))
+        ]:
+            assert len(bulk_results) == len(file_paths), "Should return one result per file"
+            for bulk, single in zip(bulk_results, single_results):
+                assert bulk.file_info.path == single.file_info.path, "Results should keep input order"
+                assert bulk.masked_content == single.masked_content, "Bulk masking should match single-file masking"
+                assert len(bulk.entities_found) == len(single.entities_found), "Bulk detection should match single-file detection"
+                print(f"  • {mode} {bulk.file_info.path}: {len(bulk.entities_found)} entities")
+    
+    finally:
+        for path in file_paths:
+            if os.path.exists(path):
+                os.remove(path)
+    
+    print("\n✅ Bulk file processing test completed!")
+
+def test_xlsx_formula_cells():
+    """Test that PII in formula text is found whether or not calamine is installed"""
+    
+    print("🧪 Testing XLSX Formula Cells")
+    print("=" * 50)
+    
+    import openpyxl
+    
+    engine = PIIDetectionEngine()
+    processor = FileProcessor(engine)
+    
+    # Never recalculated, so the file holds the formula but no cached result
+    wb = openpyxl.Workbook()
+    wb.active['A1'] = '=CONCATENATE("SSN ","123-45-6789")'
+    wb.active['B1'] = 'no personal data'
+    wb.save('test_formula.xlsx')
+    
+    try:
+        result = processor.process_file('test_formula.xlsx')
+        values = [entity.value for entity in result.entities_found]
+        print(f"  • Entities found: {values}")
+        assert '123-45-6789' in values, "SSN inside a formula should be detected"
+    
+    finally:
+        if os.path.exists('test_formula.xlsx'):
+            os.remove('test_formula.xlsx')
+    
+    print("\n✅ XLSX formula cells test completed!")
+
 if __name__ == "__main__":
     test_file_processor()
+    test_process_files()
+    test_xlsx_formula_cells()